@@ -1,4 +1,5 @@
-import yfinance as yf
+from data_providers import DEFAULT_PROVIDER
+from indicators import current_atr
 import numpy as np
 import pandas as pd
 from IPython.display import display
@@ -80,43 +81,21 @@ def bracketOrder(parentOrderId, action, quantity, limitPrice, takeProfitPrice, s
     return [parent, takeProfit, stopLoss]
 
 # Funktion zum Abrufen der historischen Aktiendaten
-def get_stock_data(ticker_symbol, period="3mo"):
+def get_stock_data(ticker_symbol, period="3mo", provider=None):
     """
     Ruft die historischen Daten für eine Aktie von Yahoo Finance ab.
 
     Args:
     ticker_symbol (str): Das Tickersymbol der Aktie.
     period (str): Der Zeitraum, für den die historischen Daten abgerufen werden sollen.
+    provider (MarketDataProvider): Die Datenquelle, standardmäßig Yahoo Finance.
 
     Returns:
     tuple: Listen von Höchst-, Tiefst- und Schlusskursen.
     """
-    stock = yf.Ticker(ticker_symbol)
-    hist = stock.history(period=period)
+    hist = (provider or DEFAULT_PROVIDER).history(ticker_symbol, period=period)
     return hist['High'].tolist(), hist['Low'].tolist(), hist['Close'].tolist()
 
-# Funktion zur Berechnung des Average True Range (ATR)
-def calculate_atr(high_prices, low_prices, close_prices, period=21):
-    """
-    Berechnet den Average True Range (ATR) einer Aktie.
-
-    Args:
-    high_prices (list): Liste der Höchstkurse.
-    low_prices (list): Liste der Tiefstkurse.
-    close_prices (list): Liste der Schlusskurse.
-    period (int): Die Periode, über die der ATR berechnet wird.
-
-    Returns:
-    float: Der berechnete ATR-Wert.
-    """
-    tr_values = [max(high, low, previous_close) - min(low, previous_close) 
-                 for high, low, previous_close in zip(high_prices[1:], low_prices[1:], close_prices[:-1])]
-    tr_values.insert(0, high_prices[0] - low_prices[0])  # Erster TR-Wert
-
-    # ATR berechnen, indem der Durchschnitt der TR-Werte über die angegebene Periode genommen wird
-    atr = np.mean(tr_values[-period:])
-    return atr
-
 # Funktion zur Berechnung des einfachen gleitenden Durchschnitts (SMA)
 def calculate_sma(close_prices, period=21):
     """
@@ -134,14 +113,14 @@ def calculate_sma(close_prices, period=21):
         return None  # Rückgabe von None, wenn nicht genügend Daten vorhanden sind
     return np.mean(close_prices[-period:])
 
-def calculate_position(depot_size=100000, risk_per_position=10, total_risk=5, anzahl_positionen=5, ticker_symbol="AAPL"):
-    high_prices, low_prices, close_prices = get_stock_data(ticker_symbol)
+def calculate_position(depot_size=100000, risk_per_position=10, total_risk=5, anzahl_positionen=5, ticker_symbol="AAPL", provider=None):
+    high_prices, low_prices, close_prices = get_stock_data(ticker_symbol, provider=provider)
     
     # Der Kaufpreis ist der letzte Schlusskurs plus 0,5%
     stock_price = high_prices[-1] * 1.005
         
     # Berechnen Sie den ATR (Average True Range) mit Periode 21
-    atr_21 = calculate_atr(high_prices, low_prices, close_prices, period=21)
+    atr_21 = current_atr(high_prices, low_prices, close_prices, period=21)
     
     # Berechnen Sie den SMA21
     sma_21 = calculate_sma(close_prices, period=21)
@@ -2,59 +2,25 @@ import pandas as pd
 from IPython.display import display
 from datetime import datetime
 import os
-from ibapi.client import EClient
-from ibapi.wrapper import EWrapper
-from ibapi.contract import Contract
-from threading import Event
+from data_providers import IBKRProvider
 
-class IBApp(EWrapper, EClient):
-    def __init__(self):
-        EClient.__init__(self, self)
-        self.data = {}
-        self.reqId = 0
-        self.event = Event()
-
-    def historicalData(self, reqId, bar):
-        if reqId not in self.data:
-            self.data[reqId] = []
-        self.data[reqId].append(bar)
-
-    def historicalDataEnd(self, reqId, start, end):
-        self.event.set()
-
-def fetch_historical_data(symbol):
-    app = IBApp()
-    app.connect("127.0.0.1", 4002, 0)  # Port auf 4002 geändert
-
-    contract = Contract()
-    contract.symbol = symbol
-    contract.secType = "STK"
-    contract.exchange = "SMART"
-    contract.currency = "USD"
-
-    app.reqId += 1
-    app.reqHistoricalData(app.reqId, contract, "", "1 Y", "1 day", "MIDPOINT", 1, 1, False, [])
-    
-    app.event.clear()
-    app.run()
-    
-    app.event.wait(timeout=60)
-    app.disconnect()
-    
-    if app.reqId in app.data:
-        return app.data[app.reqId]
-    else:
-        return None
+def fetch_historical_data(symbols, provider=None):
+    # Standardmäßig eine IB-Verbindung für alle Symbole, die Anfragen laufen parallel (je eigene reqId)
+    if provider is not None:
+        return provider.histories(symbols, period="1y")
+    provider = IBKRProvider("127.0.0.1", 4002, clientId=0, whatToShow="MIDPOINT")  # Port auf 4002 geändert
+    try:
+        return provider.histories(symbols, period="1y")
+    finally:
+        provider.close()
 
-def calculate_relative_strength(symbol):
+def calculate_relative_strength(symbol, data):
     try:
-        data = fetch_historical_data(symbol)
-        
-        if not data:
+        if data is None or data.empty:
             return None, None, None
         
-        start_price = data[0].close
-        end_price = data[-1].close
+        start_price = data['Close'].iloc[0]
+        end_price = data['Close'].iloc[-1]
         
         if pd.isna(start_price):
             return None, None, None
@@ -66,16 +32,15 @@ def calculate_relative_strength(symbol):
         print(f"Fehler beim Abrufen von {symbol}: {e}")
         return None, None, None
 
-def relative_strength_rating(symbols):
+def relative_strength_rating(symbols, provider=None):
     price_changes = []
     
+    symbols = [str(symbol).strip() for symbol in symbols]
+    symbols = [symbol for symbol in symbols if symbol]
+    histories = fetch_historical_data(symbols, provider)
+    
     for symbol in symbols:
-        symbol = str(symbol).strip()
-        
-        if not symbol:
-            continue
-        
-        start_price, end_price, price_change = calculate_relative_strength(symbol)
+        start_price, end_price, price_change = calculate_relative_strength(symbol, histories.get(symbol))
         
         if price_change is not None:
             price_changes.append((symbol, start_price, end_price, price_change))
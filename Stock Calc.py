@@ -1,48 +1,26 @@
-import yfinance as yf
-import numpy as np
+from data_providers import DEFAULT_PROVIDER
+from indicators import current_atr
 import pandas as pd
 from IPython.display import display
 
 # Funktion zum Abrufen der historischen Aktiendaten
-def get_stock_data(ticker_symbol, period="1mo"):
+def get_stock_data(ticker_symbol, period="1mo", provider=None):
     """
     Ruft die historischen Daten für eine Aktie von Yahoo Finance ab.
 
     Args:
     ticker_symbol (str): Das Tickersymbol der Aktie.
     period (str): Der Zeitraum, für den die historischen Daten abgerufen werden sollen.
+    provider (MarketDataProvider): Die Datenquelle, standardmäßig Yahoo Finance.
 
     Returns:
     tuple: Listen von Höchst-, Tiefst- und Schlusskursen.
     """
-    stock = yf.Ticker(ticker_symbol)
-    hist = stock.history(period=period)
+    hist = (provider or DEFAULT_PROVIDER).history(ticker_symbol, period=period)
     return hist['High'].tolist(), hist['Low'].tolist(), hist['Close'].tolist()
 
-# Funktion zur Berechnung des Average True Range (ATR)
-def calculate_atr(high_prices, low_prices, close_prices, period=21):
-    """
-    Berechnet den Average True Range (ATR) einer Aktie.
-
-    Args:
-    high_prices (list): Liste der Höchstkurse.
-    low_prices (list): Liste der Tiefstkurse.
-    close_prices (list): Liste der Schlusskurse.
-    period (int): Die Periode, über die der ATR berechnet wird.
-
-    Returns:
-    float: Der berechnete ATR-Wert.
-    """
-    tr_values = [max(high, low, previous_close) - min(low, previous_close) 
-                 for high, low, previous_close in zip(high_prices[1:], low_prices[1:], close_prices[:-1])]
-    tr_values.insert(0, high_prices[0] - low_prices[0])  # Erster TR-Wert
-
-    # ATR berechnen, indem der Durchschnitt der TR-Werte über die angegebene Periode genommen wird
-    atr = np.mean(tr_values[-period:])
-    return atr
-
 # Funktion zur Berechnung der Position
-def calculate_position(depot_size=20000, risk_per_position=10, total_risk=5, anzahl_positionen=5, ticker_symbol="AAPL"):
+def calculate_position(depot_size=20000, risk_per_position=10, total_risk=5, anzahl_positionen=5, ticker_symbol="AAPL", provider=None):
     """
     Berechnet die Anzahl der Aktien, den Kaufpreis und den Stop-Loss-Preis basierend auf verschiedenen Risikoparametern.
 
@@ -52,17 +30,18 @@ def calculate_position(depot_size=20000, risk_per_position=10, total_risk=5, anz
     total_risk (int): Das Gesamtrisiko des Portfolios in Prozent.
     anzahl_positionen (int): Die Anzahl der Positionen.
     ticker_symbol (str): Das Tickersymbol der Aktie.
+    provider (MarketDataProvider): Die Datenquelle, standardmäßig Yahoo Finance.
 
     Returns:
     tuple: Anzahl der Aktien, Kaufpreis, ATR-basierter Stop-Loss-Preis, niedrigster Stop-Loss-Preis, 20%-Stop-Loss-Preis, ATR(21).
     """
-    high_prices, low_prices, close_prices = get_stock_data(ticker_symbol)
+    high_prices, low_prices, close_prices = get_stock_data(ticker_symbol, provider=provider)
     
     # Der Kaufpreis ist der letzte Schlusskurs plus 0,1%
     stock_price = high_prices[-1] * 1.001
     
     # Berechnen Sie den ATR (Average True Range) mit Periode 21
-    atr_21 = calculate_atr(high_prices, low_prices, close_prices, period=21)
+    atr_21 = current_atr(high_prices, low_prices, close_prices, period=21)
     
     # Berechnen Sie das maximale Risiko für das Portfolio in USD
     max_portfolio_risk = depot_size * (total_risk / 100)
@@ -1,4 +1,3 @@
-import yfinance as yf
 import math
 import time
 from ibapi.client import EClient
@@ -8,6 +7,10 @@ from ibapi.order import Order
 from ibapi.common import OrderId
 import threading
 import numpy as np
+from functools import lru_cache
+import yfinance as yf
+from indicators import average_true_range
+from rate_limiter import get_shared_session
 
 # Global variables to store the user-provided parameters
 account_balance = None
@@ -16,6 +19,9 @@ risk_per_trade = None
 total_risk = None
 win_probability = None
 
+# Handelstage für ATR und SMA des Stop-Loss
+SNAPSHOT_DAYS = 21
+
 class TradingApp(EWrapper, EClient):
     def __init__(self):
         EClient.__init__(self, self.wrapper)
@@ -101,6 +107,49 @@ def get_user_parameters():
     
     return account_balance, position_size, risk_per_trade, total_risk, win_probability
 
+@lru_cache(maxsize=32)
+def get_ticker_snapshot(ticker_symbol, provider=None):
+    """
+    Fetches the price history of a ticker once and derives all values the buy program needs.
+
+    Three months are read, because one calendar month often holds fewer
+    than 21 trading days; the ATR and SMA then use exactly the last 21 bars.
+    The prices set the buy and stop prices of a live order, so by default
+    they are downloaded from Yahoo Finance directly instead of from the price
+    cache, which may hold bars from before the open. The result is memoized
+    for the rest of the session.
+
+    Args:
+        ticker_symbol (str): The stock ticker symbol.
+        provider (MarketDataProvider): An alternative data source, e.g. a LocalProvider for replays.
+
+    Returns:
+        dict: current_price, prev_day_high, prev_day_close, atr, sma_21 and lowest_low_14d.
+
+    Raises:
+        ValueError: If fewer than 21 daily bars are available.
+    """
+    if provider is None:
+        history = yf.Ticker(ticker_symbol, session=get_shared_session()).history(period="3mo")
+    else:
+        history = provider.history(ticker_symbol, period="3mo")
+    if len(history) < SNAPSHOT_DAYS:
+        raise ValueError(f"Nur {len(history)} Kurstage für {ticker_symbol} verfügbar, "
+                         f"mindestens {SNAPSHOT_DAYS} benötigt.")
+    last_21d = history.iloc[-SNAPSHOT_DAYS:]
+    last_bar = history.iloc[-1]
+    # Die True Range des ersten der 21 Tage braucht den Schlusskurs davor
+    atr = average_true_range(history['High'], history['Low'], history['Close'], period=SNAPSHOT_DAYS)
+
+    return {
+        "current_price": last_bar['Close'],
+        "prev_day_high": last_bar['High'],
+        "prev_day_close": last_bar['Close'],
+        "atr": atr[-1, 0],
+        "sma_21": last_21d['Close'].mean(),
+        "lowest_low_14d": history['Low'].iloc[-14:].min(),
+    }
+
 def stock_buy_program():
     """
     A program to assist with stock buying decisions.
@@ -119,10 +168,14 @@ def stock_buy_program():
     ticker_symbol = input("Enter the stock ticker symbol: ")
     
     # Step 2: Calculate the buy price
-    stock = yf.Ticker(ticker_symbol)
-    current_price = stock.history(period="1d")['Close'].iloc[0]
-    prev_day_high = stock.history(period="1d")['High'].iloc[0]
-    prev_day_close = stock.history(period="1d")['Close'].iloc[0]
+    try:
+        snapshot = get_ticker_snapshot(ticker_symbol)
+    except ValueError as e:
+        print(e)
+        return
+    current_price = snapshot["current_price"]
+    prev_day_high = snapshot["prev_day_high"]
+    prev_day_close = snapshot["prev_day_close"]
     
     print(f"Current price for {ticker_symbol}: {current_price:.2f}")
     
@@ -134,9 +187,9 @@ def stock_buy_program():
     buy_price = select_option("Buy Price", buy_price_options)
     
     # Step 3: Calculate the stop loss
-    atr = stock.history(period="21d")['Close'].diff().abs().mean()
-    sma_21 = stock.history(period="21d")['Close'].mean()
-    lowest_low_14d = stock.history(period="14d")['Low'].min()
+    atr = snapshot["atr"]
+    sma_21 = snapshot["sma_21"]
+    lowest_low_14d = snapshot["lowest_low_14d"]
     
     stop_loss_options = [
         (buy_price[0], buy_price[0] - atr, (buy_price[0] - (buy_price[0] - atr)) / buy_price[0] * 100),
@@ -1,4 +1,5 @@
 import yfinance as yf
+from indicators import current_atr
 import numpy as np
 import pandas as pd
 from IPython.display import display
@@ -78,27 +79,6 @@ def get_stock_data(ticker_symbol, period="1mo"):
     hist = stock.history(period=period)
     return hist['High'].tolist(), hist['Low'].tolist(), hist['Close'].tolist()
 
-def calculate_atr(high_prices, low_prices, close_prices, period=21):
-    """
-    Calculate the Average True Range (ATR) for a given period.
-
-    Parameters:
-    high_prices (list): List of high prices.
-    low_prices (list): List of low prices.
-    close_prices (list): List of close prices.
-    period (int): The period over which to calculate the ATR.
-
-    Returns:
-    float: The calculated ATR value.
-    """
-    tr_values = [max(high, low, previous_close) - min(low, previous_close) 
-                             for high, low, previous_close in zip(high_prices[1:], low_prices[1:], close_prices[:-1])]
-    tr_values = [max(high, previous_close) - min(low, previous_close) 
-                             for high, low, previous_close in zip(high_prices[1:], low_prices[1:], close_prices[:-1])]
-    tr_values.insert(0, high_prices[0] - low_prices[0])
-    atr = np.mean(tr_values[-period:])
-    return atr
-
 def calculate_sma(prices, period=20):
     """Berechnet den einfachen gleitenden Durchschnitt (SMA) über eine gegebene Periode."""
     if len(prices) < period:
@@ -108,7 +88,7 @@ def calculate_sma(prices, period=20):
 def calculate_position(depot_size, risk_per_position, total_risk, p, ticker_symbol="AAPL"):
     high_prices, low_prices, close_prices = get_stock_data(ticker_symbol)
     stock_price = high_prices[-1] * 1.001  # Kaufpreis leicht oberhalb des aktuellen Höchstkurses
-    atr_21 = calculate_atr(high_prices, low_prices, close_prices, period=21)
+    atr_21 = current_atr(high_prices, low_prices, close_prices, period=21)
     max_portfolio_risk = depot_size * (total_risk / 100)
     max_position_risk = depot_size * (risk_per_position / 100)
     max_position_risk = min(max_position_risk, max_portfolio_risk)
@@ -2,6 +2,7 @@ import pandas as pd
 from IPython.display import display
 from datetime import datetime
 import os
+from price_matrix import PriceMatrix, rank_ratings
 
 def weighted_price_change(row):
     # Berechnung der gewichteten Preisänderung
@@ -22,7 +23,7 @@ def relative_strength_rating(df):
     df.sort_values(by='Weighted Change', ascending=False, inplace=True)
     
     # Berechnung der relativen Stärke
-    df['Relative Strength Rating'] = df['Weighted Change'].rank(ascending=False, method='min').apply(lambda x: int((len(df) - x) / len(df) * 99) + 1)
+    df['Relative Strength Rating'] = rank_ratings(df['Weighted Change'])
     
     # Sortieren nach relativer Stärke absteigend
     df.sort_values(by='Relative Strength Rating', ascending=False, inplace=True)
@@ -32,8 +33,11 @@ def relative_strength_rating(df):
 # Abfrage nach dem Dateipfad der Quelldatei
 source_file_path = input("Bitte den Dateipfad der Quelldatei eingeben (z.B. /Users/fraal/Downloads/stocklist DOW JONES.csv): ")
 
-# Einlesen der Liste der Aktien aus der CSV-Datei
-df = pd.read_csv(source_file_path, sep=';')
+# Einlesen der Liste der Aktien aus der CSV-Datei oder direkt aus einer Kursmatrix (Verzeichnis, siehe price_matrix.py)
+if os.path.isdir(source_file_path):
+    df = PriceMatrix(source_file_path).lookback_table()
+else:
+    df = pd.read_csv(source_file_path, sep=';')
 
 # Entfernen der Zeilen mit NaN-Werten in den relevanten Spalten
 df = df.dropna(subset=['last price', 'price 3mo', 'price 6mo', 'price 9mo', 'price 12mo', 'change 3mo', 'change 6mo', 'change 9mo', 'change 12mo'])
@@ -1,5 +1,5 @@
 import yfinance as yf
-import numpy as np
+from indicators import current_atr
 import pandas as pd
 from IPython.display import display
 from ibapi.client import *
@@ -133,13 +133,6 @@ def calculate_position(depot_size=20000, risk_per_position=10, total_risk=5, anz
     """
     return hist['High'].tolist(), hist['Low'].tolist(), hist['Close'].tolist()
 
-# Funktion zur Berechnung des Average True Range (ATR)
-def calculate_atr(high_prices, low_prices, close_prices, period=21):
-    tr_values = [max(high - low, abs(high - previous_close), abs(low - previous_close)) 
-                 for high, low, previous_close in zip(high_prices[1:], low_prices[1:], close_prices[:-1])]
-    tr_values.insert(0, high_prices[0] - low_prices[0])  # Erster TR-Wert
-    atr = np.mean(tr_values[-period:])
-    return atr
 def main():
     """
     Main function to connect to Interactive Brokers API, fetch stock data, calculate positions,
@@ -154,7 +147,7 @@ def calculate_position(depot_size=20000, risk_per_position=10, total_risk=5, anz
     high_prices, low_prices, close_prices = get_stock_data(ticker_symbol)
     # Calculate stock price with the given multiplier
     stock_price = high_prices[-1] * multiplier
-    atr_21 = calculate_atr(high_prices, low_prices, close_prices, period=21)
+    atr_21 = current_atr(high_prices, low_prices, close_prices, period=21)
     max_portfolio_risk = depot_size * (total_risk / 100)
     max_position_risk = depot_size * (risk_per_position / 100)
     max_position_risk = min(max_position_risk, max_portfolio_risk)
@@ -1,65 +1,69 @@
-import yfinance as yf
 import pandas as pd
+from data_providers import DEFAULT_PROVIDER
+from indicators import candle_counts, stack_right_aligned
 
-def calculate_candle_ratios(ticker, n):
+def candle_ratio(green_candles, red_candles):
+    """
+    Verhältnis von grünen zu roten Kerzen (1.0, wenn es nur eine Farbe gibt).
+    """
+    if red_candles == 0 or green_candles == 0:
+        return 1.0
+    return green_candles / red_candles
+
+def calculate_candle_ratios_batch(tickers, windows=(10, 20, 50), provider=None):
+    """
+    Berechnet die Anzahl der grünen und roten Kerzen basierend auf dem Vortagesvergleich
+    für mehrere Aktientickersymbole und mehrere Zeiträume in einem Durchlauf.
+
+    :param tickers: Liste von Aktientickersymbolen
+    :param windows: Die Anzahlen der zu berechnenden Kerzen, z.B. (10, 20, 50)
+    :param provider: Die Datenquelle, standardmäßig Yahoo Finance
+    :return: Ein DataFrame mit einer Zeile pro Ticker und Zeitraum (Spalten Symbol, n,
+             green_candles, red_candles, ratio); Ticker ohne genügend Daten fehlen
+    """
+    # Zeitraum bestimmen: wir brauchen n+1 Tage, um n Kerzen zu berechnen
+    period = '6mo' if max(windows) <= 90 else '1y'
+    histories = (provider or DEFAULT_PROVIDER).histories(tickers, period=period)
+    close = stack_right_aligned(histories, 'Close')
+
+    rows = []
+    for n in windows:
+        green, red = candle_counts(close, n)
+        if not len(close):
+            continue
+        for symbol, green_candles, red_candles in zip(histories, green[-1], red[-1]):
+            if pd.isna(green_candles):
+                continue
+            rows.append({
+                'Symbol': symbol,
+                'n': n,
+                'green_candles': int(green_candles),
+                'red_candles': int(red_candles),
+                'ratio': candle_ratio(green_candles, red_candles),
+            })
+    return pd.DataFrame(rows, columns=['Symbol', 'n', 'green_candles', 'red_candles', 'ratio'])
+
+def calculate_candle_ratios(ticker, n, provider=None):
     """
     Berechnet die Anzahl der grünen und roten Kerzen basierend auf dem Vortagesvergleich
     für die letzten n Handelstage eines gegebenen Aktientickersymbols.
 
     :param ticker: Das Aktientickersymbol als String
     :param n: Die Anzahl der zu berechnenden Kerzen
+    :param provider: Die Datenquelle, standardmäßig Yahoo Finance
     :return: Ein Dictionary mit der Anzahl der grünen und roten Kerzen und dem Verhältnis
     """
-    # Wir brauchen n+1 Tage, um n Kerzen zu berechnen
-    extra_days = n + 1  
+    results = calculate_candle_ratios_batch([ticker], windows=(n,), provider=provider)
 
-    # Zeitraum für yfinance bestimmen
-    period = '6mo' if n <= 90 else '1y'
+    # Prüfen, ob genügend Daten vorhanden sind
+    if results.empty:
+        raise ValueError(f"Keine oder nicht genügend Daten für {ticker} gefunden (benötigt: {n + 1} Tage).")
 
-    # Historische Daten abrufen
-    data = yf.download(ticker, period=period)
-
-    # Prüfen, ob Daten vorhanden sind
-    if data.empty:
-        raise ValueError(f"Keine Daten für {ticker} gefunden.")
-
-    # Sicherstellen, dass genügend Daten verfügbar sind
-    if len(data) < extra_days:
-        raise ValueError(f"Nicht genügend Daten: Nur {len(data)} statt {extra_days} verfügbar.")
-
-    # Die letzten n+1 Handelstage auswählen
-    data = data.iloc[-extra_days:]
-
-    # Berechnung der Kerzenfarbe anhand des Vortags
-    green_candles = 0
-    red_candles = 0
-
-    for i in range(1, len(data)):  # Start bei 1, weil wir den Vortag brauchen
-        current_close = data["Close"].iloc[i].item()  # Sicherstellen, dass der Wert ein Scalar ist
-        previous_close = data["Close"].iloc[i - 1].item()  # Sicherstellen, dass der Wert ein Scalar ist
-        
-        if current_close > previous_close:
-            green_candles += 1
-        elif current_close < previous_close:
-            red_candles += 1
-
-    # Verhältnis berechnen
-    if red_candles == 0:
-        ratio = 1.0
-        result_text = "Es gibt nur grüne Kerzen"
-    elif green_candles == 0:
-        ratio = 1.0
-        result_text = "Es gibt nur rote Kerzen"
-    else:
-        ratio = green_candles / red_candles
-        result_text = ""
-
-    return {
-        'green_candles': green_candles,
-        'red_candles': red_candles,
-        'ratio': ratio,
-    }
+    return results.iloc[0][['green_candles', 'red_candles', 'ratio']].to_dict()
 
 # Beispielaufruf für 20 Kerzen
 result = calculate_candle_ratios('AAPL', 20)
-print(result)
\ No newline at end of file
+print(result)
+
+# Beispielaufruf für mehrere Ticker und Zeiträume
+print(calculate_candle_ratios_batch(['AAPL', 'MSFT', 'NVDA'], windows=(10, 20, 50)))
@@ -0,0 +1,527 @@
+import numpy as np
+import pandas as pd
+
+from indicators import rolling_max, rolling_mean, rolling_min
+
+# Standardparameter der "Cup with Handle"-Formation
+CUP_DEPTH_THRESHOLD = 0.33  # 33% decline from the peak
+HANDLE_DEPTH_THRESHOLD = 0.12  # 12% decline from the peak
+UPTREND_THRESHOLD = 0.30  # 30% uptrend before the base's construction
+VOLUME_WINDOW = 50  # Average volume for the breakout check
+
+
+def _forward_window(values, window):
+    """
+    Returns max and min of values[i:i + window] for every start index i
+    (NaN where the window runs past the end).
+    """
+    highest = np.full(len(values), np.nan)
+    lowest = np.full(len(values), np.nan)
+    if window <= len(values):
+        highest[:len(values) - window + 1] = rolling_max(values, window)[window - 1:, 0]
+        lowest[:len(values) - window + 1] = rolling_min(values, window)[window - 1:, 0]
+    return highest, lowest
+
+
+class _ForwardWindows:
+    """
+    Prefix extrema and forward window extrema of closes and volumes,
+    computed once (per window length) and shared by all parameter sets of
+    a scan.
+    """
+
+    def __init__(self, close, volume):
+        self.close = close
+        self.volume = volume
+        self.windows = {}
+        # Kursspanne vor jedem Tag i (Tage 0 bis i-1)
+        self.prefix_max = np.concatenate([[np.nan], np.maximum.accumulate(close)[:-1]])
+        self.prefix_min = np.concatenate([[np.nan], np.minimum.accumulate(close)[:-1]])
+
+    def __call__(self, window):
+        if window not in self.windows:
+            close_max, close_min = _forward_window(self.close, window)
+            volume_max, _ = _forward_window(self.volume, window)
+            self.windows[window] = (close_max, close_min, volume_max)
+        return self.windows[window]
+
+
+def _cup_candidates(close, volume, avg_volume, windows, cup_length, handle_length, uptrend_threshold):
+    """
+    Evaluates the parts of the "cup with handle" rules that do not depend on
+    the depth thresholds for every start day of one cup/handle length.
+    With `uptrend_threshold` None the uptrend before the cup is not checked.
+
+    Returns:
+        dict: Start days and their cup/handle measures, plus the mask of the
+            threshold-independent conditions (None if no start day fits).
+    """
+    length = len(close)
+    last_start = length - cup_length - handle_length
+    if last_start <= 1:
+        return None
+
+    prefix_max, prefix_min = windows.prefix_max, windows.prefix_min
+    cup_max, cup_min, cup_volume_max = windows(cup_length)
+    handle_max, handle_min, handle_volume_max = windows(handle_length)
+
+    i = np.arange(1, last_start)
+    handle_start = i + cup_length
+    breakout = handle_start + handle_length
+    with np.errstate(divide="ignore", invalid="ignore"):
+        candidates = {
+            "start": i,
+            "handle_start": handle_start,
+            "breakout": breakout,
+            "cup_high": cup_max[i],
+            "cup_low": cup_min[i],
+            "pivot": handle_max[handle_start],
+            "handle_low": handle_min[handle_start],
+            "cup_depth": (cup_max[i] - cup_min[i]) / cup_max[i],
+            "handle_depth": (handle_max[handle_start] - handle_min[handle_start]) / handle_max[handle_start],
+            "cup_volume_max": cup_volume_max[i],
+            "handle_volume_max": handle_volume_max[handle_start],
+            "breakout_volume": volume[breakout],
+            "avg_volume": avg_volume[breakout],
+        }
+        candidates["mask"] = (
+            # Flacher Henkel oberhalb des unteren Drittels des Cups
+            (candidates["handle_low"] > cup_min[i] + (cup_max[i] - cup_min[i]) / 3)
+            # Henkel beginnt mit einem Abwärtstag
+            & (close[handle_start] > close[handle_start + 1])
+            # Volumen nimmt im Henkel ab, Ausbruch mit überdurchschnittlichem Volumen
+            & (candidates["cup_volume_max"] > candidates["handle_volume_max"])
+            & (candidates["breakout_volume"] > candidates["avg_volume"])
+            & ((candidates["pivot"] + candidates["handle_low"]) / 2 > (cup_max[i] + cup_min[i]) / 2)
+        )
+        if uptrend_threshold is not None:
+            candidates["mask"] &= (prefix_max[i] - prefix_min[i]) / prefix_min[i] >= uptrend_threshold
+    return candidates
+
+
+def _threshold_mask(candidates, cup_length, cup_depth_threshold, handle_depth_threshold):
+    cup_depth = candidates["cup_depth"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (
+            candidates["mask"]
+            # Cup mindestens 1,5-mal so lang wie tief
+            & (cup_depth > cup_depth_threshold) & (cup_length / cup_depth >= 1.5)
+            & (candidates["handle_depth"] < handle_depth_threshold)
+        )
+
+
+def _prepare(close, volume, avg_volume):
+    close = np.asarray(close, dtype=np.float64)
+    volume = np.asarray(volume, dtype=np.float64)
+    if avg_volume is None:
+        avg_volume = rolling_mean(volume, VOLUME_WINDOW)[:, 0]
+    return close, volume, np.asarray(avg_volume, dtype=np.float64)
+
+
+def cup_with_handle_starts(close, volume, cup_length=30, handle_length=None,
+                           cup_depth_threshold=CUP_DEPTH_THRESHOLD, handle_depth_threshold=HANDLE_DEPTH_THRESHOLD,
+                           uptrend_threshold=UPTREND_THRESHOLD, avg_volume=None):
+    """
+    Finds every start day of a "cup with handle" formation in O(n).
+
+    The cup covers `cup_length` days from the start day, the handle the
+    following `handle_length` days and the breakout is the day after. All
+    window highs and lows come from prefix and sliding-window extrema that
+    are computed once, so the cost no longer depends on the number of start
+    days that are tested.
+
+    Args:
+        close (ndarray): The closes, oldest first.
+        volume (ndarray): The volumes, same length.
+        cup_length (int): Number of days of the cup.
+        handle_length (int): Number of days of the handle (defaults to `cup_length`).
+        cup_depth_threshold (float): Minimum decline from the peak within the cup.
+        handle_depth_threshold (float): Maximum decline within the handle.
+        uptrend_threshold (float): Minimum price range before the cup.
+        avg_volume (ndarray): The 50-day average volume, if already calculated.
+
+    Returns:
+        ndarray: Boolean array, True at every start day of a formation.
+    """
+    close, volume, avg_volume = _prepare(close, volume, avg_volume)
+    handle_length = cup_length if handle_length is None else handle_length
+    starts = np.zeros(len(close), dtype=bool)
+    candidates = _cup_candidates(close, volume, avg_volume, _ForwardWindows(close, volume),
+                                 cup_length, handle_length, uptrend_threshold)
+    if candidates is not None:
+        starts[candidates["start"]] = _threshold_mask(candidates, cup_length, cup_depth_threshold,
+                                                      handle_depth_threshold)
+    return starts
+
+
+def scan_cup_with_handle(data, cup_lengths=(30, 42), handle_lengths=(None,),
+                         cup_depth_thresholds=(CUP_DEPTH_THRESHOLD,), handle_depth_thresholds=(HANDLE_DEPTH_THRESHOLD,),
+                         uptrend_threshold=UPTREND_THRESHOLD, avg_volume=None):
+    """
+    Scans one history for "cup with handle" formations over a parameter grid.
+
+    Window extrema are computed once per distinct cup or handle length and
+    reused by every parameter set, so a grid costs little more than a
+    single scan.
+
+    Args:
+        data (DataFrame): A DataFrame with historical data.
+        cup_lengths (tuple): Cup lengths in days.
+        handle_lengths (tuple): Handle lengths in days (None: same as the cup).
+        cup_depth_thresholds (tuple): Minimum cup depths.
+        handle_depth_thresholds (tuple): Maximum handle depths.
+        uptrend_threshold (float): Minimum price range before the cup.
+        avg_volume (Series): The 50-day average volume, if already calculated.
+
+    Returns:
+        DataFrame: One row per match and parameter set with the parameters,
+            start/handle/breakout positions and dates, pivot (handle high,
+            the buy point), cup and handle depth and the volume figures.
+    """
+    close, volume, avg_volume = _prepare(data['Close'].to_numpy(), data['Volume'].to_numpy(), avg_volume)
+    windows = _ForwardWindows(close, volume)
+    matches = []
+    for cup_length in cup_lengths:
+        for handle_length in handle_lengths:
+            handle_length = cup_length if handle_length is None else handle_length
+            candidates = _cup_candidates(close, volume, avg_volume, windows, cup_length, handle_length,
+                                         uptrend_threshold)
+            if candidates is None:
+                continue
+            for cup_depth_threshold in cup_depth_thresholds:
+                for handle_depth_threshold in handle_depth_thresholds:
+                    mask = _threshold_mask(candidates, cup_length, cup_depth_threshold, handle_depth_threshold)
+                    if not mask.any():
+                        continue
+                    found = pd.DataFrame({name: values[mask] for name, values in candidates.items() if name != "mask"})
+                    found.insert(0, "handle_depth_threshold", handle_depth_threshold)
+                    found.insert(0, "cup_depth_threshold", cup_depth_threshold)
+                    found.insert(0, "handle_length", handle_length)
+                    found.insert(0, "cup_length", cup_length)
+                    matches.append(found)
+
+    columns = ["cup_length", "handle_length", "cup_depth_threshold", "handle_depth_threshold", "start",
+               "handle_start", "breakout", "cup_high", "cup_low", "pivot", "handle_low", "cup_depth",
+               "handle_depth", "cup_volume_max", "handle_volume_max", "breakout_volume", "avg_volume"]
+    if not matches:
+        results = pd.DataFrame(columns=columns)
+    else:
+        results = pd.concat(matches, ignore_index=True)[columns]
+    results["volume_ratio"] = results["breakout_volume"] / results["avg_volume"]
+    results["start_date"] = data.index[results["start"].to_numpy(dtype=int)]
+    results["breakout_date"] = data.index[results["breakout"].to_numpy(dtype=int)]
+    return results
+
+
+def detect_cup_with_handle(data, cup_length=30, avg_volume=None, **params):
+    """
+    Checks if a "cup with handle" formation is present.
+
+    Args:
+        data (DataFrame): A DataFrame with historical data.
+        cup_length (int): Number of days of the cup.
+        avg_volume (Series): The 50-day average volume, if already calculated.
+        **params: Further thresholds of cup_with_handle_starts().
+
+    Returns:
+        bool: True if a "cup with handle" formation is present, otherwise False.
+    """
+    starts = cup_with_handle_starts(data['Close'].to_numpy(), data['Volume'].to_numpy(), cup_length,
+                                    avg_volume=None if avg_volume is None else np.asarray(avg_volume), **params)
+    return bool(starts.any())
+
+
+# Standardparameter der übrigen Basen
+SWING_THRESHOLD = 0.04  # Minimum reversal that confirms a swing high or low
+FLAT_BASE_LENGTH = 25  # 5 weeks
+FLAT_BASE_DEPTH = 0.15  # At most 15% from high to low
+DOUBLE_BOTTOM_DEPTH = (0.15, 0.40)  # Decline from the left high to the second low
+ASCENDING_BASE_PULLBACKS = (0.10, 0.20)  # Depth of each of the pullbacks
+VCP_LAST_CONTRACTION = 0.10  # Maximum depth of the final contraction
+
+
+def zigzag(close, threshold=SWING_THRESHOLD):
+    """
+    Finds the confirmed swing highs and lows of a series of closes.
+
+    A high (low) is confirmed once the price has fallen (risen) by at least
+    `threshold` from it; the swings therefore alternate between highs and
+    lows. The still unconfirmed extreme at the end is not included.
+
+    Args:
+        close (ndarray): The closes, oldest first.
+        threshold (float): Minimum reversal, e.g. 0.04 for 4%.
+
+    Returns:
+        tuple: (positions, kinds) as arrays; kind is 1 for a high and -1 for a low.
+    """
+    positions, kinds = [], []
+    trend = 0
+    high_pos = low_pos = extreme = 0
+    for i in range(1, len(close)):
+        price = close[i]
+        if trend == 0:
+            # Richtung erst nach der ersten ausreichend großen Bewegung festlegen
+            if price > close[high_pos]:
+                high_pos = i
+            if price < close[low_pos]:
+                low_pos = i
+            if close[high_pos] >= close[low_pos] * (1 + threshold):
+                if high_pos > low_pos:
+                    positions.append(low_pos)
+                    kinds.append(-1)
+                    trend, extreme = 1, high_pos
+                else:
+                    positions.append(high_pos)
+                    kinds.append(1)
+                    trend, extreme = -1, low_pos
+        elif trend == 1:
+            if price > close[extreme]:
+                extreme = i
+            elif price <= close[extreme] * (1 - threshold):
+                positions.append(extreme)
+                kinds.append(1)
+                trend, extreme = -1, i
+        else:
+            if price < close[extreme]:
+                extreme = i
+            elif price >= close[extreme] * (1 + threshold):
+                positions.append(extreme)
+                kinds.append(-1)
+                trend, extreme = 1, i
+    return np.array(positions, dtype=int), np.array(kinds, dtype=int)
+
+
+def _runs(mask):
+    """
+    Returns the first and last index of every run of True values.
+    """
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1) - 1
+
+
+class PatternPrimitives(_ForwardWindows):
+    """
+    The building blocks shared by all base detectors of one history.
+
+    Swings, contractions and window extrema are computed on first use and
+    then reused by every detector, so each additional pattern only adds its
+    own (cheap) rule evaluation to a scan.
+    """
+
+    def __init__(self, data, avg_volume=None, swing_threshold=SWING_THRESHOLD):
+        close, volume, avg_volume = _prepare(data['Close'].to_numpy(), data['Volume'].to_numpy(), avg_volume)
+        super().__init__(close, volume)
+        self.avg_volume = avg_volume
+        self.swing_threshold = swing_threshold
+        self.trailing_windows = {}
+        self._swings = None
+        self._contractions = None
+
+    def trailing(self, window):
+        """
+        Returns max and min of the closes of the `window` days ending at each day.
+        """
+        if window not in self.trailing_windows:
+            self.trailing_windows[window] = (rolling_max(self.close, window)[:, 0],
+                                             rolling_min(self.close, window)[:, 0])
+        return self.trailing_windows[window]
+
+    @property
+    def swings(self):
+        if self._swings is None:
+            self._swings = zigzag(self.close, self.swing_threshold)
+        return self._swings
+
+    @property
+    def contractions(self):
+        """
+        Every pullback from a swing high to the following swing low.
+
+        Returns:
+            dict: Arrays high_pos, low_pos, high, low, depth and ratio (depth
+                relative to the previous pullback, NaN for the first one).
+        """
+        if self._contractions is None:
+            positions, kinds = self.swings
+            highs = np.flatnonzero(kinds[:-1] == 1)
+            high_pos, low_pos = positions[highs], positions[highs + 1]
+            high, low = self.close[high_pos], self.close[low_pos]
+            depth = (high - low) / high
+            ratio = np.concatenate([[np.nan], depth[1:] / depth[:-1]]) if len(depth) else depth
+            self._contractions = {"high_pos": high_pos, "low_pos": low_pos, "high": high, "low": low,
+                                  "depth": depth, "ratio": ratio}
+        return self._contractions
+
+
+def flat_bases(primitives, length=FLAT_BASE_LENGTH, max_depth=FLAT_BASE_DEPTH, prior_uptrend=0.20, prior_length=60):
+    """
+    Finds flat bases: at least `length` days within `max_depth` of the high,
+    after a rise of at least `prior_uptrend` over the `prior_length` days
+    before the base.
+    """
+    close = primitives.close
+    highest, lowest = primitives.trailing(length)
+    _, prior_low = primitives.trailing(prior_length)
+    end = np.arange(len(close))
+    start = end - length + 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        before = np.maximum(start - 1, 0)
+        mask = ((start >= 1) & ((highest - lowest) / highest <= max_depth)
+                & ((highest - prior_low[before]) / prior_low[before] >= prior_uptrend))
+
+    # Überlappende Fenster zu einer Basis zusammenfassen
+    matches = []
+    for first, last in zip(*_runs(mask)):
+        base = close[first - length + 1:last + 1]
+        pivot = base.max()
+        matches.append({"start": first - length + 1, "end": last, "pivot": pivot,
+                        "depth": (pivot - base.min()) / pivot})
+    return matches
+
+
+def double_bottoms(primitives, min_length=35, max_length=65, min_gap=10, depth_range=DOUBLE_BOTTOM_DEPTH,
+                   max_undercut=0.05):
+    """
+    Finds double bottoms (W shape): a second swing low that slightly
+    undercuts the first one, both below a left-side high. The pivot is the
+    middle peak between the two lows.
+    """
+    close = primitives.close
+    positions, kinds = primitives.swings
+    lows = positions[kinds == -1]
+    min_depth, max_depth = depth_range
+    matches = []
+    for second in lows:
+        # Tiefster früherer Swing-Tief im zulässigen Abstand
+        earlier = lows[(lows >= second - max_length) & (lows <= second - min_gap)]
+        if len(earlier) == 0:
+            continue
+        first = earlier[np.argmin(close[earlier])]
+        if not close[first] * (1 - max_undercut) <= close[second] <= close[first]:
+            continue
+        start = max(second - max_length, 0)
+        left = start + int(np.argmax(close[start:first + 1]))
+        left_high = close[left]
+        middle = close[first:second + 1].max()
+        depth = (left_high - close[second]) / left_high
+        if second - left >= min_length and min_depth <= depth <= max_depth and middle < left_high:
+            matches.append({"start": left, "end": second, "pivot": middle, "depth": depth})
+    return matches
+
+
+def ascending_bases(primitives, pullbacks=3, depth_range=ASCENDING_BASE_PULLBACKS, max_length=80):
+    """
+    Finds ascending bases: `pullbacks` successive pullbacks of `depth_range`
+    each, with higher highs and higher lows, within `max_length` days.
+    """
+    contractions = primitives.contractions
+    min_depth, max_depth = depth_range
+    # Kleinere Rücksetzer zwischen den Pullbacks ignorieren
+    significant = np.flatnonzero(contractions["depth"] >= min_depth)
+    high_pos, low_pos = contractions["high_pos"][significant], contractions["low_pos"][significant]
+    high, low, depth = (contractions[name][significant] for name in ("high", "low", "depth"))
+    matches = []
+    for k in range(pullbacks - 1, len(significant)):
+        window = slice(k - pullbacks + 1, k + 1)
+        if (np.all(depth[window] <= max_depth) and np.all(np.diff(high[window]) > 0)
+                and np.all(np.diff(low[window]) > 0) and low_pos[k] - high_pos[window.start] <= max_length):
+            matches.append({"start": high_pos[window.start], "end": low_pos[k], "pivot": high[k],
+                            "depth": (high[k] - low[window].min()) / high[k]})
+    return matches
+
+
+def volatility_contractions(primitives, min_contractions=2, max_first=0.35, max_last=VCP_LAST_CONTRACTION,
+                            max_length=130, high_tolerance=0.05, max_volume_ratio=1.0):
+    """
+    Finds volatility contraction patterns (VCP): at least `min_contractions`
+    successive pullbacks, each shallower than the one before, whose highs
+    stay within `high_tolerance` of the first high. The final contraction is
+    at most `max_last` deep and comes on below-average volume; contractions
+    before the 50-day average volume exists do not count.
+    """
+    contractions = primitives.contractions
+    high_pos, low_pos = contractions["high_pos"], contractions["low_pos"]
+    high, depth, ratio = contractions["high"], contractions["depth"], contractions["ratio"]
+    volume, avg_volume = primitives.volume, primitives.avg_volume
+
+    # Beginn der laufenden Folge immer flacherer Rücksetzer je Kontraktion
+    first = np.arange(len(depth))
+    for k in range(1, len(depth)):
+        if ratio[k] < 1 and high[k] <= high[first[k - 1]] * (1 + high_tolerance):
+            first[k] = first[k - 1]
+
+    matches = {}
+    for k in range(len(depth)):
+        j = first[k]
+        if (k - j + 1 < min_contractions or depth[j] > max_first or depth[k] > max_last
+                or low_pos[k] - high_pos[j] > max_length):
+            continue
+        # Volumen trocknet in der letzten Kontraktion aus (nur prüfbar, sobald der Durchschnitt vorliegt)
+        if (not np.isfinite(avg_volume[low_pos[k]])
+                or volume[high_pos[k]:low_pos[k] + 1].mean() > avg_volume[low_pos[k]] * max_volume_ratio):
+            continue
+        matches[j] = {"start": high_pos[j], "end": low_pos[k], "pivot": high[k],
+                      "depth": (high[j] - contractions["low"][j:k + 1].min()) / high[j]}
+    return list(matches.values())
+
+
+def cups_with_handle(primitives, cup_length=30, handle_length=None, cup_depth_threshold=CUP_DEPTH_THRESHOLD,
+                     handle_depth_threshold=HANDLE_DEPTH_THRESHOLD, uptrend_threshold=UPTREND_THRESHOLD):
+    """
+    Finds "cup with handle" formations (see cup_with_handle_starts()); runs of
+    neighbouring start days count as one formation.
+    """
+    handle_length = cup_length if handle_length is None else handle_length
+    candidates = _cup_candidates(primitives.close, primitives.volume, primitives.avg_volume, primitives,
+                                 cup_length, handle_length, uptrend_threshold)
+    if candidates is None:
+        return []
+    mask = _threshold_mask(candidates, cup_length, cup_depth_threshold, handle_depth_threshold)
+    return [{"start": candidates["start"][k], "end": candidates["breakout"][k], "pivot": candidates["pivot"][k],
+             "depth": candidates["cup_depth"][k]} for k in _runs(mask)[1]]
+
+
+# Basis-Detektoren der Pattern-Engine; weitere Formationen hier eintragen
+PATTERN_DETECTORS = {
+    "flat_base": flat_bases,
+    "double_bottom": double_bottoms,
+    "ascending_base": ascending_bases,
+    "vcp": volatility_contractions,
+    "cup_with_handle": cups_with_handle,
+}
+
+
+def scan_base_patterns(data, patterns=None, avg_volume=None, swing_threshold=SWING_THRESHOLD, **params):
+    """
+    Scans one history for all base patterns in a single pass.
+
+    The shared primitives (swing highs and lows, contractions, window
+    extrema and the average volume) are computed once and every detector
+    of PATTERN_DETECTORS is evaluated against them.
+
+    Args:
+        data (DataFrame): A DataFrame with historical data.
+        patterns (list): Names of the patterns to look for (defaults to all).
+        avg_volume (Series): The 50-day average volume, if already calculated.
+        swing_threshold (float): Minimum reversal that confirms a swing.
+        **params: Parameters per pattern, e.g. flat_base={"max_depth": 0.12}.
+
+    Returns:
+        DataFrame: One row per formation with pattern name, start and end
+            position and date, pivot (buy point), depth and the volume on
+            the end day relative to the 50-day average.
+    """
+    primitives = PatternPrimitives(data, None if avg_volume is None else np.asarray(avg_volume), swing_threshold)
+    rows = []
+    for name in patterns or PATTERN_DETECTORS:
+        for match in PATTERN_DETECTORS[name](primitives, **params.get(name, {})):
+            rows.append({"pattern": name, **match})
+
+    results = pd.DataFrame(rows, columns=["pattern", "start", "end", "pivot", "depth"])
+    end = results["end"].to_numpy(dtype=int)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        results["volume_ratio"] = primitives.volume[end] / primitives.avg_volume[end]
+    results["start_date"] = data.index[results["start"].to_numpy(dtype=int)]
+    results["end_date"] = data.index[end]
+    return results
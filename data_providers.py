@@ -0,0 +1,295 @@
+import os
+from abc import ABC, abstractmethod
+
+import pandas as pd
+import yfinance as yf
+
+from price_cache import CACHE_DIR, get_histories, get_history, slice_period
+from price_panel import PricePanel
+from rate_limiter import get_shared_session
+
+
+class UnsupportedDataError(NotImplementedError):
+    """
+    Raised when a provider cannot deliver a kind of data, e.g. earnings from
+    the IB API or option quotes from local files.
+    """
+
+
+class MarketDataProvider(ABC):
+    """
+    Common interface of all market data sources.
+
+    Analysis functions take a provider instead of calling yfinance or the
+    IB API directly, so the data source can be switched (or replayed from
+    local files) without touching the analysis code. History is always
+    returned as a DataFrame with Open, High, Low, Close and Volume columns
+    indexed by date.
+
+    Every provider implements history(), option_expirations(), option_chain()
+    and earnings(); a provider without a source for options or earnings
+    raises UnsupportedDataError there.
+    """
+
+    @abstractmethod
+    def history(self, symbol, period="1y"):
+        """
+        Returns the daily bars of a symbol.
+
+        Args:
+            symbol (str): The stock symbol.
+            period (str): A yfinance period such as "3mo", "1y" or "21d".
+
+        Returns:
+            DataFrame: A DataFrame with historical data.
+        """
+
+    def histories(self, symbols, period="1y"):
+        """
+        Returns the daily bars of many symbols.
+
+        Args:
+            symbols (list): A list of stock symbols.
+            period (str): A yfinance period string.
+
+        Returns:
+            dict: A DataFrame with historical data per symbol (symbols without data are skipped).
+        """
+        histories = {}
+        for symbol in symbols:
+            data = self.history(symbol, period)
+            if data is not None and not data.empty:
+                histories[symbol] = data
+        return histories
+
+    def panel(self, symbols, period="1y"):
+        """
+        Returns the daily bars of many symbols as a compact PricePanel.
+
+        Args:
+            symbols (list): A list of stock symbols.
+            period (str): A yfinance period string.
+
+        Returns:
+            PricePanel: float32 prices and uint32 volumes on shared trading days.
+        """
+        return PricePanel.from_histories(self.histories(symbols, period))
+
+    def quote(self, symbol):
+        """
+        Returns the latest price of a symbol.
+
+        Args:
+            symbol (str): The stock symbol.
+
+        Returns:
+            float: The latest price, or None if not available.
+        """
+        data = self.history(symbol, period="5d")
+        return None if data is None or data.empty else data['Close'].iloc[-1]
+
+    @abstractmethod
+    def option_expirations(self, symbol):
+        """
+        Returns the expiration dates of the listed options of a symbol.
+
+        Args:
+            symbol (str): The stock symbol.
+
+        Returns:
+            tuple: Expiration dates as strings (YYYY-MM-DD).
+
+        Raises:
+            UnsupportedDataError: If the provider has no option data.
+        """
+
+    @abstractmethod
+    def option_chain(self, symbol, expiration):
+        """
+        Returns the calls and puts of a symbol for one expiration date.
+
+        Args:
+            symbol (str): The stock symbol.
+            expiration (str): The expiration date (YYYY-MM-DD).
+
+        Returns:
+            tuple: DataFrames of calls and puts (strike, lastPrice, ...).
+
+        Raises:
+            UnsupportedDataError: If the provider has no option data.
+        """
+
+    @abstractmethod
+    def earnings(self, symbol):
+        """
+        Returns the earnings history of a symbol.
+
+        Args:
+            symbol (str): The stock symbol.
+
+        Returns:
+            DataFrame: The reported quarters (epsActual, epsEstimate, ...) indexed by date.
+
+        Raises:
+            UnsupportedDataError: If the provider has no earnings data.
+        """
+
+
+class YFinanceProvider(MarketDataProvider):
+    """
+    Yahoo Finance via yfinance; price history is read through the local cache.
+    """
+
+    def history(self, symbol, period="1y"):
+        return get_history(symbol, period=period)
+
+    def histories(self, symbols, period="1y"):
+        return get_histories(symbols, period=period)
+
+    def quote(self, symbol):
+        return yf.Ticker(symbol, session=get_shared_session()).fast_info['lastPrice']
+
+    def option_expirations(self, symbol):
+        return yf.Ticker(symbol, session=get_shared_session()).options
+
+    def option_chain(self, symbol, expiration):
+        chain = yf.Ticker(symbol, session=get_shared_session()).option_chain(expiration)
+        return chain.calls, chain.puts
+
+    def earnings(self, symbol):
+        return yf.Ticker(symbol, session=get_shared_session()).earnings_history
+
+
+def _ib_duration(period):
+    """
+    Converts a yfinance period string into an IB duration string.
+    """
+    if period == "max":
+        return "20 Y"
+    if period == "ytd":
+        return f"{pd.Timestamp.today().dayofyear} D"
+    units = {"d": "D", "wk": "W", "mo": "M", "y": "Y"}
+    for suffix, unit in units.items():
+        if period.endswith(suffix) and period[:-len(suffix)].isdigit():
+            return f"{period[:-len(suffix)]} {unit}"
+    raise ValueError(f"Unknown period: {period}")
+
+
+def bars_to_frame(bars):
+    """
+    Converts a list of IB BarData into an OHLCV DataFrame.
+
+    Args:
+        bars (list): Daily BarData, oldest first.
+
+    Returns:
+        DataFrame: Open, High, Low, Close and Volume indexed by date.
+    """
+    if not bars:
+        return pd.DataFrame(columns=['Open', 'High', 'Low', 'Close', 'Volume'])
+    data = pd.DataFrame({
+        'Open': [bar.open for bar in bars],
+        'High': [bar.high for bar in bars],
+        'Low': [bar.low for bar in bars],
+        'Close': [bar.close for bar in bars],
+        'Volume': [float(bar.volume) for bar in bars],
+    }, index=pd.DatetimeIndex([pd.Timestamp(str(bar.date)[:8]) for bar in bars], name="Date"))
+    return data
+
+
+class IBKRProvider(MarketDataProvider):
+    """
+    Interactive Brokers via one shared IBHistoryClient connection.
+
+    The connection is opened on first use and closed with close(). Only
+    price history is supported; options and earnings raise UnsupportedDataError.
+    """
+
+    def __init__(self, host="127.0.0.1", port=4002, clientId=1, whatToShow="TRADES", timeout=60):
+        self.host = host
+        self.port = port
+        self.clientId = clientId
+        self.whatToShow = whatToShow
+        self.timeout = timeout
+        self.client = None
+
+    def _client(self):
+        if self.client is None:
+            from ib_history import IBHistoryClient
+            self.client = IBHistoryClient().start(self.host, self.port, clientId=self.clientId)
+        return self.client
+
+    def close(self):
+        if self.client is not None:
+            self.client.stop()
+            self.client = None
+
+    def history(self, symbol, period="1y"):
+        return self.histories([symbol], period).get(symbol, bars_to_frame([]))
+
+    def histories(self, symbols, period="1y"):
+        results = self._client().fetch_histories(symbols, timeout=self.timeout, durationStr=_ib_duration(period),
+                                                 barSizeSetting="1 day", whatToShow=self.whatToShow)
+        return {symbol: bars_to_frame(bars) for symbol, bars in results.items() if bars}
+
+    def option_expirations(self, symbol):
+        raise UnsupportedDataError("IBKRProvider liefert keine Optionsketten.")
+
+    def option_chain(self, symbol, expiration):
+        raise UnsupportedDataError("IBKRProvider liefert keine Optionsketten.")
+
+    def earnings(self, symbol):
+        raise UnsupportedDataError("Die IB API liefert keine Earnings-Historie.")
+
+
+class LocalProvider(MarketDataProvider):
+    """
+    Replays stored daily bars from disk, without any network access.
+
+    Reads <SYMBOL>.parquet (the price_cache format) or <SYMBOL>.csv with a
+    Date column from `directory`. With `as_of` all data after that day is
+    hidden and periods are counted back from it, so scans can be benchmarked
+    offline and reproduced exactly. The files hold daily bars only, so
+    options and earnings raise UnsupportedDataError.
+    """
+
+    def __init__(self, directory=CACHE_DIR, as_of=None):
+        self.directory = directory
+        self.as_of = pd.Timestamp(as_of) if as_of is not None else None
+        self.cache = {}
+
+    def _load(self, symbol):
+        if symbol in self.cache:
+            return self.cache[symbol]
+        safe_symbol = str(symbol).strip().upper().replace("/", "_")
+        parquet_path = os.path.join(self.directory, f"{safe_symbol}.parquet")
+        csv_path = os.path.join(self.directory, f"{safe_symbol}.csv")
+        if os.path.exists(parquet_path):
+            data = pd.read_parquet(parquet_path)
+        elif os.path.exists(csv_path):
+            data = pd.read_csv(csv_path, index_col='Date', parse_dates=True)
+        else:
+            data = None
+        if data is not None and self.as_of is not None:
+            dates = data.index.tz_localize(None) if data.index.tz is not None else data.index
+            data = data[dates.normalize() <= self.as_of]
+        self.cache[symbol] = data
+        return data
+
+    def history(self, symbol, period="1y"):
+        data = self._load(symbol)
+        if data is None or data.empty:
+            return pd.DataFrame(columns=['Open', 'High', 'Low', 'Close', 'Volume'])
+        return slice_period(data, period, today=self.as_of)
+
+    def option_expirations(self, symbol):
+        raise UnsupportedDataError("LocalProvider liefert keine Optionsketten.")
+
+    def option_chain(self, symbol, expiration):
+        raise UnsupportedDataError("LocalProvider liefert keine Optionsketten.")
+
+    def earnings(self, symbol):
+        raise UnsupportedDataError("LocalProvider liefert keine Earnings-Daten.")
+
+
+DEFAULT_PROVIDER = YFinanceProvider()
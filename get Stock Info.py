@@ -1,36 +1,25 @@
-import yfinance as yf
+from data_providers import DEFAULT_PROVIDER
+from indicators import calculate_indicators_batch
+from indicator_cache import DEFAULT_CACHE, cached_indicator
 import pandas as pd
 from IPython.display import display
 
-def get_stock_data(symbol):
+def get_stock_data(symbol, provider=None):
     """
     Fetch historical stock data for the given symbol over the past year.
 
     Parameters:
     symbol (str): The stock ticker symbol.
+    provider (MarketDataProvider): The data source, defaults to Yahoo Finance.
 
     Returns:
     pandas.DataFrame: Historical stock data.
     """
-    stock = yf.Ticker(symbol)
-    data = stock.history(period="1y")
+    data = (provider or DEFAULT_PROVIDER).history(symbol, period="1y")
     return data
 
 def calculate_indicators(data):
-    data['SMA5'] = data['Close'].rolling(window=5).mean()
-    data['SMA10'] = data['Close'].rolling(window=10).mean()
-    data['SMA20'] = data['Close'].rolling(window=20).mean()
-    data['SMA50'] = data['Close'].rolling(window=50).mean()
-    data['SMA100'] = data['Close'].rolling(window=100).mean()
-    data['SMA200'] = data['Close'].rolling(window=200).mean()
-    data['ATR21'] = data['High'].rolling(window=21).max() - data['Low'].rolling(window=21).min()
-    
-    data['BB_middle'] = data['Close'].rolling(window=20).mean()
-    data['BB_std'] = data['Close'].rolling(window=20).std()
-    data['BB_upper'] = data['BB_middle'] + (2 * data['BB_std'])
-    data['BB_lower'] = data['BB_middle'] - (2 * data['BB_std'])
-    
-    return data
+    return calculate_indicators_batch({None: data})[None]
 
 def calculate_percentage_change(data, days):
     if days >= len(data):
@@ -53,14 +42,20 @@ def calculate_trend(data):
         return "fallend"
 
 def calculate_lowest_low(data, days):
+    # Vorberechnete Spalte LL<days> aus calculate_indicators() verwenden, falls vorhanden
+    # (bei weniger als <days> Kurstagen ist sie NaN, dann zählen die vorhandenen Tage)
+    if f'LL{days}' in data and pd.notna(data[f'LL{days}'].iloc[-1]):
+        return data[f'LL{days}'].iloc[-1]
     return data['Low'].iloc[-days:].min()
 
 def calculate_highest_high(data, days):
+    if f'HH{days}' in data and pd.notna(data[f'HH{days}'].iloc[-1]):
+        return data[f'HH{days}'].iloc[-1]
     return data['High'].iloc[-days:].max()
 
-def calculate_metrics(symbol):
-    data = get_stock_data(symbol)
-    data = calculate_indicators(data)
+def calculate_metrics(symbol, provider=None, data=None):
+    if data is None:
+        data = cached_indicator(symbol, get_stock_data(symbol, provider), 'STOCK_INFO', calculate_indicators)
     
     high_low_range = data['High'].iloc[-2] - data['Low'].iloc[-2]
     high_low_range_pct = (high_low_range / data['Low'].iloc[-2]) * 100
@@ -112,8 +107,15 @@ def main():
         symbols_df = pd.read_csv(file_path)
         all_results = {}
         
-        for symbol in symbols_df['Symbol']:
-            all_results[symbol] = calculate_metrics(symbol)
+        # Kurse aller Symbole laden; Indikatoren nur für Symbole mit neuen Kursen in einem Durchlauf berechnen
+        histories = DEFAULT_PROVIDER.histories(symbols_df['Symbol'].tolist(), period="1y")
+        frames = {symbol: DEFAULT_CACHE.get(symbol, data, 'STOCK_INFO') for symbol, data in histories.items()}
+        missing = {symbol: histories[symbol] for symbol, data in frames.items() if data is None}
+        for symbol, data in calculate_indicators_batch(missing).items():
+            DEFAULT_CACHE.put(symbol, histories[symbol], 'STOCK_INFO', data)
+            frames[symbol] = data
+        for symbol, data in frames.items():
+            all_results[symbol] = calculate_metrics(symbol, data=data)
         
         results_df = pd.DataFrame(all_results)
         display(results_df)
@@ -0,0 +1,67 @@
+import pandas as pd
+from data_providers import DEFAULT_PROVIDER
+from chart_patterns import PATTERN_DETECTORS, scan_base_patterns
+from parallel_scan import parallel_scan
+
+def read_stock_symbols(filename):
+    """
+    Reads the CSV file with stock symbols.
+
+    Args:
+        filename (str): The filename of the CSV file.
+
+    Returns:
+        list: A list of stock symbols.
+    """
+    df = pd.read_csv(filename)
+    return df['Symbol'].tolist()
+
+def scan_bases(symbols, patterns=None, provider=None, workers=1, **params):
+    """
+    Scans a list of stock symbols for flat bases, double bottoms, ascending bases,
+    volatility contraction patterns and "cup with handle" formations.
+
+    Args:
+        symbols (list): A list of stock symbols.
+        patterns (list): Names of the patterns (defaults to all of PATTERN_DETECTORS).
+        provider (MarketDataProvider): The data source, defaults to Yahoo Finance.
+        workers (int): Number of worker processes; None uses all cores, 1 scans in this process.
+        **params: Parameters per pattern, e.g. flat_base={"max_depth": 0.12}.
+
+    Returns:
+        DataFrame: One row per symbol and formation (see scan_base_patterns()).
+    """
+    histories = (provider or DEFAULT_PROVIDER).histories(symbols, period="1y")
+    if workers != 1:
+        return parallel_scan(histories, max_workers=workers, scanner="base_patterns", patterns=patterns, **params)
+    matches = []
+    for symbol, data in histories.items():
+        found = scan_base_patterns(data, patterns, **params)
+        if not found.empty:
+            found.insert(0, "Symbol", symbol)
+            matches.append(found)
+    return pd.concat(matches, ignore_index=True) if matches else pd.DataFrame()
+
+def main():
+    """
+    Main function that reads a CSV file with stock symbols, scans them for base patterns and outputs the results.
+    """
+    filename = input("Please enter the filename of the CSV file: ")
+    symbols = read_stock_symbols(filename)
+    matches = scan_bases(symbols, workers=None)
+
+    if matches.empty:
+        print("Keine Basis gefunden.")
+        return
+    # Jüngste Formation je Symbol und Muster mit Pivot (Kaufpunkt)
+    for pattern in PATTERN_DETECTORS:
+        found = matches[matches["pattern"] == pattern]
+        if found.empty:
+            continue
+        print(f"{pattern}:")
+        for symbol, latest in found.sort_values("end").groupby("Symbol").last().iterrows():
+            print(f"  {symbol}: Pivot {latest['pivot']:.2f}, Tiefe {latest['depth']:.0%}, "
+                  f"Ende am {latest['end_date']:%Y-%m-%d}")
+
+if __name__ == "__main__":
+    main()
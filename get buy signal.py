@@ -1,8 +1,24 @@
 import pandas as pd
 import numpy as np
-import yfinance as yf
+from data_providers import DEFAULT_PROVIDER
+from indicators import ichimoku
+from chart_patterns import detect_cup_with_handle
+from indicator_cache import INDICATOR_CACHE_DIR, IndicatorCache
 from IPython.display import display
 
+# Indikatoren werden pro Symbol und Kursstand zwischengespeichert (auch über Programmläufe hinweg)
+indicator_cache = IndicatorCache(directory=INDICATOR_CACHE_DIR)
+
+# Parameters for the cup with handle formation
+CUP_DEPTH_THRESHOLD = 0.33  # 33% decline from the peak
+CUP_LENGTH_MIN = 30  # Minimum number of days for the cup formation
+UPTREND_THRESHOLD = 0.30  # 30% uptrend before the base's construction
+
+# Default universe filters, applied before any indicator is calculated
+MIN_PRICE = 10.0  # Minimum last close in USD
+MIN_AVG_VOLUME = 200000  # Minimum 20-day average volume in shares
+REQUIRE_UPTREND = True  # Last close above the 50-day average close
+
 def read_stock_symbols(filename):
     """
     Reads the CSV file with stock symbols.
@@ -19,18 +35,18 @@ def read_stock_symbols(filename):
     else:
         raise ValueError("The CSV file does not contain a 'Symbol' column.")
 
-def get_stock_data(symbol):
+def get_stock_data(symbol, provider=None):
     """
     Retrieves historical data for a given stock symbol.
 
     Args:
         symbol (str): The stock symbol.
+        provider (MarketDataProvider): The data source, defaults to Yahoo Finance.
 
     Returns:
         DataFrame: A DataFrame with historical data.
     """
-    stock = yf.Ticker(symbol)
-    return stock.history(period="1y")
+    return (provider or DEFAULT_PROVIDER).history(symbol, period="1y")
 
 def calculate_sma(data, window):
     """
@@ -45,131 +61,216 @@ def calculate_sma(data, window):
     """
     return data['Close'].rolling(window=window).mean()
 
-def calculate_ichimoku(data):
+def calculate_average_volume(data, window):
     """
-    Calculates the Ichimoku components.
+    Calculates the moving average of the trading volume.
 
     Args:
         data (DataFrame): A DataFrame with historical data.
+        window (int): The window size for the moving average.
 
     Returns:
-        None: The function adds the Ichimoku components directly to the DataFrame.
+        Series: A series with the average volume.
     """
-    high_9 = data['High'].rolling(window=9).max()
-    low_9 = data['Low'].rolling(window=9).min()
-    tenkan_sen = (high_9 + low_9) / 2
+    return data['Volume'].rolling(window=window).mean()
 
-    high_26 = data['High'].rolling(window=26).max()
-    low_26 = data['Low'].rolling(window=26).min()
-    kijun_sen = (high_26 + low_26) / 2
+def calculate_ichimoku_lines(data):
+    """
+    Calculates the Ichimoku components without modifying the DataFrame.
 
-    data['Tenkan_Sen'] = tenkan_sen
-    data['Kijun_Sen'] = kijun_sen
+    Args:
+        data (DataFrame): A DataFrame with historical data.
 
-    span_a = ((tenkan_sen + kijun_sen) / 2).shift(26)
-    high_52 = data['High'].rolling(window=52).max()
-    low_52 = data['Low'].rolling(window=52).min()
-    span_b = ((high_52 + low_52) / 2).shift(26)
+    Returns:
+        dict: Arrays of Tenkan_Sen, Kijun_Sen, Span_A and Span_B.
+    """
+    lines = ichimoku(data['High'].to_numpy(), data['Low'].to_numpy())
+    return {name: values[:, 0] for name, values in lines.items()}
 
-    data['Span_A'] = span_a
-    data['Span_B'] = span_b
+def calculate_ichimoku(data, symbol=None):
+    """
+    Calculates the Ichimoku components.
 
-def check_cup_with_handle(data):
+    Args:
+        data (DataFrame): A DataFrame with historical data.
+        symbol (str): The stock symbol, used as cache key (None disables caching).
+
+    Returns:
+        None: The function adds the Ichimoku components directly to the DataFrame.
+    """
+    lines = indicator_cache.compute(symbol, data, 'ICHIMOKU', calculate_ichimoku_lines)
+    for name, values in lines.items():
+        data[name] = values
+
+def check_cup_with_handle(data, symbol=None, avg_volume_50=None):
     """
     Checks if a "cup with handle" formation is present.
 
     Args:
         data (DataFrame): A DataFrame with historical data.
+        symbol (str): The stock symbol, used as cache key (None disables caching).
+        avg_volume_50 (Series): The 50-day average volume, if already calculated.
 
     Returns:
         bool: True if a "cup with handle" formation is present, otherwise False.
     """
-    cup_found = False
-    handle_found = False
-
-    # Parameters for the cup with handle formation
-    cup_depth_threshold = 0.33  # 33% decline from the peak
-    handle_depth_threshold = 0.12  # 12% decline from the peak
-    cup_length_min = 30  # Minimum number of days for the cup formation
-    handle_length_min = 5  # Minimum number of days for the handle formation
-    handle_length_max = cup_length_min  # Handle should not exceed the cup portion in time
-
-    # Check for a 30% uptrend before the base's construction
-    uptrend_threshold = 0.30
-    for i in range(len(data) - cup_length_min - handle_length_max):
-        pre_cup = data['Close'].iloc[:i]
-        if len(pre_cup) > 0 and (pre_cup.max() - pre_cup.min()) / pre_cup.min() >= uptrend_threshold:
-            cup = data['Close'].iloc[i:i + cup_length_min]
-            max_price = cup.max()
-            min_price = cup.min()
-            cup_depth = (max_price - min_price) / max_price
-
-            # Check if the cup is at least 1.5 times as long as it is deep
-            if cup_depth > cup_depth_threshold and len(cup) / cup_depth >= 1.5:
-                cup_found = True
-
-                # Check for the handle formation
-                handle = data['Close'].iloc[i + cup_length_min:i + cup_length_min + handle_length_max]
-                handle_max_price = handle.max()
-                handle_min_price = handle.min()
-                handle_depth = (handle_max_price - handle_min_price) / handle_max_price
-
-                # Check if the handle is relatively flat and does not exceed the cup in time or size of decline
-                if handle_depth < handle_depth_threshold and handle_min_price > min_price + (max_price - min_price) / 3:
-                    handle_found = True
-
-                    # Check if the handle starts with a down day in price
-                    if handle.iloc[0] > handle.iloc[1]:
-                        # Check if the volume decreases during the handle formation
-                        cup_volume = data['Volume'].iloc[i:i + cup_length_min]
-                        handle_volume = data['Volume'].iloc[i + cup_length_min:i + cup_length_min + handle_length_max]
-                        if cup_volume.max() > handle_volume.max():
-                            # Check if the breakout from the handle occurs with above-average volume
-                            breakout_volume = data['Volume'].iloc[i + cup_length_min + handle_length_max]
-                            avg_volume = data['Volume'].rolling(window=50).mean().iloc[i + cup_length_min + handle_length_max]
-                            if breakout_volume > avg_volume:
-                                # Additional checks for the handle
-                                handle_midpoint = (handle_max_price + handle_min_price) / 2
-                                cup_midpoint = (max_price + min_price) / 2
-                                if handle_midpoint > cup_midpoint:
-                                    return True
-
-    return False
-
-def check_buy_signals(data):
+    if avg_volume_50 is None:
+        avg_volume_50 = indicator_cache.compute(symbol, data, 'AVG_VOLUME', calculate_average_volume, window=50)
+    return detect_cup_with_handle(data, cup_length=CUP_LENGTH_MIN, avg_volume=avg_volume_50,
+                                  cup_depth_threshold=CUP_DEPTH_THRESHOLD, uptrend_threshold=UPTREND_THRESHOLD)
+
+def sma_cross_check(data, sma_15, sma_50):
+    return (sma_15.iloc[-4] < sma_50.iloc[-4]) and (sma_15.iloc[-3] > sma_50.iloc[-3])
+
+def volume_check(data, avg_volume_50):
+    return data['Volume'].iloc[-2] > 1.2 * avg_volume_50.iloc[-2] or data['Volume'].iloc[-3] > 1.2 * avg_volume_50.iloc[-3]
+
+def ichimoku_cross_check(data, lines):
+    return (lines['Tenkan_Sen'][-4] < lines['Kijun_Sen'][-4]) and (lines['Tenkan_Sen'][-3] > lines['Kijun_Sen'][-3])
+
+def ichimoku_cloud_check(data, lines):
+    cloud_top = max(lines['Span_A'][-3], lines['Span_B'][-3])
+    return lines['Tenkan_Sen'][-3] > cloud_top and lines['Kijun_Sen'][-3] > cloud_top
+
+def cup_with_handle_check(data, avg_volume_50):
+    return check_cup_with_handle(data, avg_volume_50=avg_volume_50)
+
+# Indicators the signals depend on: name -> (cache name, function, parameters)
+INDICATORS = {
+    'SMA15': ('SMA', calculate_sma, {'window': 15}),
+    'SMA50': ('SMA', calculate_sma, {'window': 50}),
+    'AVG_VOLUME50': ('AVG_VOLUME', calculate_average_volume, {'window': 50}),
+    'ICHIMOKU': ('ICHIMOKU', calculate_ichimoku_lines, {}),
+}
+
+# Buy signals with their checks; each check is (required indicators, function).
+# The checks of a signal run in order and stop at the first one that fails,
+# so cheap checks come first.
+BUY_SIGNALS = [
+    {"signal": "SMA 15 crosses SMA 50 from below",
+     "checks": [(('SMA15', 'SMA50'), sma_cross_check)]},
+    {"signal": "Trading volume is 20% higher than the 50-day average (last two trading days)",
+     "checks": [(('AVG_VOLUME50',), volume_check)]},
+    {"signal": "Strong Ichimoku buy signal: Cross above the cloud",
+     "checks": [(('ICHIMOKU',), ichimoku_cross_check), (('ICHIMOKU',), ichimoku_cloud_check)]},
+    {"signal": "Cup with handle formation detected",
+     "checks": [(('AVG_VOLUME50',), cup_with_handle_check)]},
+]
+
+class LazyIndicators:
+    """
+    Calculates the indicators of one symbol on first access only.
+
+    Args:
+        data (DataFrame): A DataFrame with historical data.
+        symbol (str): The stock symbol, used as cache key (None disables caching).
+    """
+
+    def __init__(self, data, symbol=None):
+        self.data = data
+        self.symbol = symbol
+        self.values = {}
+
+    def __getitem__(self, name):
+        if name not in self.values:
+            cache_name, function, params = INDICATORS[name]
+            self.values[name] = indicator_cache.compute(self.symbol, self.data, cache_name, function, **params)
+        return self.values[name]
+
+def check_buy_signals(data, symbol=None):
     """
     Checks for buy signals.
 
+    Indicators are only calculated when a check needs them, and the checks
+    of a signal stop at the first one that fails.
+
     Args:
         data (DataFrame): A DataFrame with historical data.
+        symbol (str): The stock symbol, used as cache key (None disables caching).
 
     Returns:
         list: A list of buy signals.
     """
     signals = []
+    indicators = LazyIndicators(data, symbol)
 
-    # SMA 15 crosses SMA 50 from below
-    sma_15 = calculate_sma(data, 15)
-    sma_50 = calculate_sma(data, 50)
-    if (sma_15.iloc[-4] < sma_50.iloc[-4]) and (sma_15.iloc[-3] > sma_50.iloc[-3]):
-        signals.append("SMA 15 crosses SMA 50 from below")
+    for buy_signal in BUY_SIGNALS:
+        if all(function(data, *(indicators[name] for name in requires)) for requires, function in buy_signal["checks"]):
+            signals.append(buy_signal["signal"])
 
-    # Trading volume is 20% higher than the 50-day average (last two trading days)
-    avg_volume_50 = data['Volume'].rolling(window=50).mean()
-    if data['Volume'].iloc[-2] > 1.2 * avg_volume_50.iloc[-2] or data['Volume'].iloc[-3] > 1.2 * avg_volume_50.iloc[-3]:
-        signals.append("Trading volume is 20% higher than the 50-day average (last two trading days)")
+    return signals
 
-    # Ichimoku condition
-    calculate_ichimoku(data)
-    if (data['Tenkan_Sen'].iloc[-4] < data['Kijun_Sen'].iloc[-4]) and (data['Tenkan_Sen'].iloc[-3] > data['Kijun_Sen'].iloc[-3]):
-        if data['Tenkan_Sen'].iloc[-3] > max(data['Span_A'].iloc[-3], data['Span_B'].iloc[-3]) and data['Kijun_Sen'].iloc[-3] > max(data['Span_A'].iloc[-3], data['Span_B'].iloc[-3]):
-            signals.append("Strong Ichimoku buy signal: Cross above the cloud")
+def passes_universe_filters(data, min_price=MIN_PRICE, min_avg_volume=MIN_AVG_VOLUME, uptrend=REQUIRE_UPTREND):
+    """
+    Cheap filters that are applied to every symbol before the signal checks.
 
-    # Check for "cup with handle" formation
-    if check_cup_with_handle(data):
-        signals.append("Cup with handle formation detected")
+    Args:
+        data (DataFrame): A DataFrame with historical data.
+        min_price (float): Minimum last close (None disables the filter).
+        min_avg_volume (float): Minimum 20-day average volume (None disables the filter).
+        uptrend (bool): Require the last close to be above the 50-day average close.
 
-    return signals
+    Returns:
+        bool: True if the symbol should be checked for buy signals.
+    """
+    close = data['Close']
+    if len(data) < 4:
+        return False
+    if min_price is not None and close.iloc[-1] < min_price:
+        return False
+    if min_avg_volume is not None and data['Volume'].iloc[-20:].mean() < min_avg_volume:
+        return False
+    if uptrend and close.iloc[-1] <= close.iloc[-50:].mean():
+        return False
+    return True
+
+def scan_buy_signals(symbols, provider=None, min_price=MIN_PRICE, min_avg_volume=MIN_AVG_VOLUME,
+                     uptrend=REQUIRE_UPTREND):
+    """
+    Checks a list of stock symbols for buy signals.
+
+    The cheap universe filters run first across all symbols; the indicators
+    (SMA, average volume, Ichimoku) and the cup with handle check only run on
+    the symbols that pass them.
+
+    Args:
+        symbols (list): A list of stock symbols.
+        provider (MarketDataProvider): The data source, defaults to Yahoo Finance.
+        min_price (float): Minimum last close (None disables the filter).
+        min_avg_volume (float): Minimum 20-day average volume (None disables the filter).
+        uptrend (bool): Require the last close to be above the 50-day average close.
+
+    Returns:
+        list: A list of dicts with the keys Symbol and Signal.
+    """
+    results = []
+    histories = (provider or DEFAULT_PROVIDER).histories(symbols, period="1y")
+    candidates = {symbol: data for symbol, data in histories.items()
+                  if passes_universe_filters(data, min_price, min_avg_volume, uptrend)}
+    print(f"{len(candidates)} of {len(histories)} symbols pass the universe filters.")
+
+    for symbol, data in candidates.items():
+        print(f"Checking buy signals for {symbol}...")
+        signals = check_buy_signals(data, symbol)
+        for signal in signals:
+            results.append({"Symbol": symbol, "Signal": signal})
+
+    return results
+
+def read_filter(prompt, default, convert=float):
+    """
+    Prompts for a universe filter value; an empty input keeps the default.
+
+    Args:
+        prompt (str): The text shown to the user.
+        default: The value used for an empty input.
+        convert (callable): Converts the input into the filter value.
+
+    Returns:
+        The entered or the default value.
+    """
+    value = input(f"{prompt} [{default}]: ").strip()
+    return convert(value) if value else default
 
 def main():
     """
@@ -184,15 +285,12 @@ def main():
     while True:
         filename = input("Please enter the filename of the CSV file: ")
         symbols = read_stock_symbols(filename)
+        min_price = read_filter("Minimum price in USD", MIN_PRICE)
+        min_avg_volume = read_filter("Minimum 20-day average volume", MIN_AVG_VOLUME)
+        uptrend = read_filter("Only stocks above their 50-day average (y/n)", "y" if REQUIRE_UPTREND else "n",
+                              str.lower) == "y"
 
-        results = []
-
-        for symbol in symbols:
-            print(f"Checking buy signals for {symbol}...")
-            data = get_stock_data(symbol)
-            signals = check_buy_signals(data)
-            for signal in signals:
-                results.append({"Symbol": symbol, "Signal": signal})
+        results = scan_buy_signals(symbols, min_price=min_price, min_avg_volume=min_avg_volume, uptrend=uptrend)
 
         if results:
             results_df = pd.DataFrame(results)
@@ -1,6 +1,9 @@
 import pandas as pd
 import numpy as np
-import yfinance as yf
+from data_providers import DEFAULT_PROVIDER
+from chart_patterns import detect_cup_with_handle, scan_cup_with_handle
+from parallel_scan import parallel_scan
+from pattern_state import update_cup_with_handle
 import matplotlib.pyplot as plt
 
 def read_stock_symbols(filename):
@@ -16,18 +19,18 @@ def read_stock_symbols(filename):
     df = pd.read_csv(filename)
     return df['Symbol'].tolist()
 
-def get_stock_data(symbol):
+def get_stock_data(symbol, provider=None):
     """
     Retrieves historical data for a given stock symbol.
 
     Args:
         symbol (str): The stock symbol.
+        provider (MarketDataProvider): The data source, defaults to Yahoo Finance.
 
     Returns:
         DataFrame: A DataFrame with historical data.
     """
-    stock = yf.Ticker(symbol)
-    return stock.history(period="1y")
+    return (provider or DEFAULT_PROVIDER).history(symbol, period="1y")
 
 def calculate_sma(data, window):
     """
@@ -42,85 +45,88 @@ def calculate_sma(data, window):
     """
     return data['Close'].rolling(window=window).mean()
 
-def check_cup_with_handle(data):
+def check_cup_with_handle(data, symbol=None):
     """
     Checks if a "cup with handle" formation is present.
 
     Args:
         data (DataFrame): A DataFrame with historical data.
+        symbol (str): The stock symbol; if given, only the bars added since the
+            last check are evaluated (see pattern_state.py).
 
     Returns:
         bool: True if a "cup with handle" formation is present, otherwise False.
     """
-    cup_found = False
-    handle_found = False
-
-    # Parameters for the cup with handle formation
-    cup_depth_threshold = 0.33  # 33% decline from the peak
-    handle_depth_threshold = 0.12  # 12% decline from the peak
-    cup_length_min = 42  # Minimum number of days for the cup formation (7 weeks)
-    handle_length_min = 5  # Minimum number of days for the handle formation
-    handle_length_max = cup_length_min  # Handle should not exceed the cup portion in time
-
-    # Check for a 30% uptrend before the base's construction
-    uptrend_threshold = 0.30
-    for i in range(len(data) - cup_length_min - handle_length_max):
-        pre_cup = data['Close'].iloc[:i]
-        if len(pre_cup) > 0 and (pre_cup.max() - pre_cup.min()) / pre_cup.min() >= uptrend_threshold:
-            cup = data['Close'].iloc[i:i + cup_length_min]
-            max_price = cup.max()
-            min_price = cup.min()
-            cup_depth = (max_price - min_price) / max_price
-
-            # Check if the cup is at least 1.5 times as long as it is deep
-            if cup_depth > cup_depth_threshold and len(cup) / cup_depth >= 1.5:
-                cup_found = True
-
-                # Check for the handle formation
-                handle = data['Close'].iloc[i + cup_length_min:i + cup_length_min + handle_length_max]
-                handle_max_price = handle.max()
-                handle_min_price = handle.min()
-                handle_depth = (handle_max_price - handle_min_price) / handle_max_price
-
-                # Check if the handle is relatively flat and does not exceed the cup in time or size of decline
-                if handle_depth < handle_depth_threshold and handle_min_price > min_price + (max_price - min_price) / 3:
-                    handle_found = True
-
-                    # Check if the handle starts with a down day in price
-                    if handle.iloc[0] > handle.iloc[1]:
-                        # Check if the volume decreases during the handle formation
-                        cup_volume = data['Volume'].iloc[i:i + cup_length_min]
-                        handle_volume = data['Volume'].iloc[i + cup_length_min:i + cup_length_min + handle_length_max]
-                        if cup_volume.max() > handle_volume.max():
-                            # Check if the breakout from the handle occurs with above-average volume
-                            breakout_volume = data['Volume'].iloc[i + cup_length_min + handle_length_max]
-                            avg_volume = data['Volume'].rolling(window=50).mean().iloc[i + cup_length_min + handle_length_max]
-                            if breakout_volume > avg_volume:
-                                # Additional checks for the handle
-                                handle_midpoint = (handle_max_price + handle_min_price) / 2
-                                cup_midpoint = (max_price + min_price) / 2
-                                if handle_midpoint > cup_midpoint:
-                                    return True
-
-    return False
-
-def analyze_chart_patterns(symbols):
+    # Cup of at least 42 days (7 weeks), handle not longer than the cup; scanned in O(n)
+    if symbol is not None:
+        return bool(update_cup_with_handle(symbol, data, cup_length=42))
+    return detect_cup_with_handle(data, cup_length=42)
+
+def analyze_chart_patterns(symbols, provider=None):
     """
     Analyzes the chart patterns for a list of stock symbols.
 
     Args:
         symbols (list): A list of stock symbols.
+        provider (MarketDataProvider): The data source, defaults to Yahoo Finance.
 
     Returns:
         list: A list of symbols with a "cup with handle" formation.
     """
     results = []
-    for symbol in symbols:
-        data = get_stock_data(symbol)
-        if check_cup_with_handle(data):
+    histories = (provider or DEFAULT_PROVIDER).histories(symbols, period="1y")
+    for symbol, data in histories.items():
+        if check_cup_with_handle(data, symbol):
             results.append(symbol)
     return results
 
+def update_chart_patterns(symbols, provider=None, cup_length=42):
+    """
+    Finds the current "cup with handle" formations of a list of stock symbols for the nightly scan.
+
+    Each symbol keeps its detector state (see pattern_state.py), so only the
+    bars added since the previous run are evaluated; a revised history
+    (split, dividend) is rescanned completely.
+
+    Args:
+        symbols (list): A list of stock symbols.
+        provider (MarketDataProvider): The data source, defaults to Yahoo Finance.
+        cup_length (int): Number of days of the cup.
+
+    Returns:
+        DataFrame: One row per symbol and formation with start and breakout date and pivot.
+    """
+    rows = []
+    histories = (provider or DEFAULT_PROVIDER).histories(symbols, period="1y")
+    for symbol, data in histories.items():
+        for formation in update_cup_with_handle(symbol, data, cup_length=cup_length):
+            rows.append({"Symbol": symbol, **formation})
+    return pd.DataFrame(rows, columns=["Symbol", "start_date", "breakout_date", "pivot", "uptrend_from", "volume_from"])
+
+def scan_chart_patterns(symbols, provider=None, workers=1, **grid):
+    """
+    Scans a list of stock symbols for "cup with handle" formations over a parameter grid.
+
+    Args:
+        symbols (list): A list of stock symbols.
+        provider (MarketDataProvider): The data source, defaults to Yahoo Finance.
+        workers (int): Number of worker processes; None uses all cores, 1 scans in this process.
+        **grid: Parameter lists of scan_cup_with_handle(), e.g. cup_lengths=(30, 42).
+
+    Returns:
+        DataFrame: One row per symbol, match and parameter set (see scan_cup_with_handle()).
+    """
+    matches = []
+    histories = (provider or DEFAULT_PROVIDER).histories(symbols, period="1y")
+    if workers != 1:
+        return parallel_scan(histories, max_workers=workers, **grid)
+    for symbol, data in histories.items():
+        found = scan_cup_with_handle(data, **grid)
+        if not found.empty:
+            found.insert(0, "Symbol", symbol)
+            matches.append(found)
+    return pd.concat(matches, ignore_index=True) if matches else pd.DataFrame()
+
 def main():
     """
     Main function that reads a CSV file with stock symbols, performs chart pattern analysis, and outputs the results.
@@ -133,12 +139,13 @@ def main():
     """
     filename = input("Please enter the filename of the CSV file: ")
     symbols = read_stock_symbols(filename)
-    results = analyze_chart_patterns(symbols)
+    matches = update_chart_patterns(symbols, cup_length=42)
     
-    if results:
+    if not matches.empty:
         print("Symbols with Cup with Handle formation:")
-        for symbol in results:
-            print(symbol)
+        # Jüngste Formation je Symbol mit Pivot (Kaufpunkt) und Ausbruchstag
+        for symbol, latest in matches.sort_values("breakout_date").groupby("Symbol").last().iterrows():
+            print(f"{symbol}: Pivot {latest['pivot']:.2f}, Ausbruch am {latest['breakout_date']:%Y-%m-%d}")
     else:
         print("No Cup with Handle formation detected for any symbol.")
 
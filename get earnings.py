@@ -1,13 +1,10 @@
-import yfinance as yf
 import pandas as pd
+from data_providers import DEFAULT_PROVIDER
 
-def get_earnings_history(symbol):
+def get_earnings_history(symbol, provider=None):
     try:
-        # Erstellen eines Ticker-Objekts für das gegebene Symbol
-        ticker = yf.Ticker(symbol)
-        
-        # Abrufen der Earnings-Daten
-        earnings = ticker.earnings_history
+        # Abrufen der Earnings-Daten über die Datenquelle (standardmäßig Yahoo Finance)
+        earnings = (provider or DEFAULT_PROVIDER).earnings(symbol)
         
         if earnings.empty:
             print(f"Keine Earnings-Daten für das Symbol {symbol} verfügbar.")
@@ -2,20 +2,20 @@ import warnings
 warnings.filterwarnings('ignore')
 
 from optionlab import run_strategy
-import yfinance as yf
 import pandas as pd
 from IPython.display import display
+from data_providers import DEFAULT_PROVIDER
 
-def find_put_options(symbol):
+def find_put_options(symbol, provider=None):
+    provider = provider or DEFAULT_PROVIDER
     # Laden der Optionsdaten für das angegebene Symbol
-    stock = yf.Ticker(symbol)
-    options = stock.options
+    options = provider.option_expirations(symbol)
     
     # Datenrahmen zur Speicherung der Ergebnisse
     results = pd.DataFrame(columns=['Expiration Date', 'Strike', 'Last Price', 'Delta', 'Days to Expiration'])
     
     # Abrufen der historischen Daten für die letzten fünf Tage
-    history = stock.history(period='5d')
+    history = provider.history(symbol, period='5d')
     
     # Sicherstellen, dass genügend Daten vorhanden sind
     if len(history) < 2:
@@ -29,7 +29,7 @@ def find_put_options(symbol):
     previous_close = history['Close'].iloc[-2]
     
     # Historische Volatilität
-    volatility = stock.history(period='1y')['Close'].pct_change().std() * (252 ** 0.5)
+    volatility = provider.history(symbol, period='1y')['Close'].pct_change().std() * (252 ** 0.5)
     
     # Ausgabe des Schlusskurses des Vortages und der berechneten Volatilität
     print(f"Schlusskurs des Vortages für {symbol}: {previous_close:.2f}")
@@ -41,8 +41,7 @@ def find_put_options(symbol):
     # Iteration über alle verfügbaren Optionsverfallsdaten
     for expiration in options:
         # Abrufen der Put-Optionen für das aktuelle Verfallsdatum
-        opt = stock.option_chain(expiration)
-        puts = opt.puts
+        _, puts = provider.option_chain(symbol, expiration)
         
         # Berechnen der Restlaufzeit in Tagen
         puts['expirationDate'] = pd.to_datetime(expiration)
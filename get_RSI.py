@@ -1,8 +1,23 @@
-from stock_indicators import indicators
+import os
 
-# This method is NOT a part of the library.
-quotes = get_historical_quotes("SPY")
+import pandas as pd
 
-# calculate RSI(14)
-results = indicators.get_rsi(quotes, 14)
-print(results)
\ No newline at end of file
+from data_providers import DEFAULT_PROVIDER
+from indicators import rsi, stoch_rsi
+from price_matrix import MATRIX_DIR, PriceMatrix
+
+quotes = DEFAULT_PROVIDER.history("SPY", period="1y")
+
+# calculate RSI(14) and Stochastic RSI(14, 14, 3)
+stoch, signal = stoch_rsi(quotes['Close'], 14, 14, 3)
+results = pd.DataFrame({
+    'RSI': rsi(quotes['Close'], 14)[:, 0],
+    'StochRSI': stoch[:, 0],
+    'Signal': signal[:, 0],
+}, index=quotes.index)
+print(results)
+
+# RSI(14) aller Symbole der Kursmatrix als Scan-Filter (überverkauft unter 30)
+if os.path.isdir(MATRIX_DIR):
+    universe_rsi = PriceMatrix(MATRIX_DIR).rsi(14)
+    print(universe_rsi[universe_rsi < 30].sort_values())
@@ -0,0 +1,532 @@
+import threading
+import time
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import datetime, timedelta
+
+from ibapi.client import EClient
+from ibapi.wrapper import EWrapper
+from ibapi.contract import Contract
+
+# Meldungen der TWS/des Gateways, die keinen Fehler einer Anfrage bedeuten
+# (Verbindungsstatus der Datenfarmen, Zeitzonen-Hinweise)
+INFO_CODES = {2104, 2106, 2107, 2108, 2158, 2174, 2176}
+
+# IB erlaubt höchstens 50 gleichzeitig offene historische Anfragen
+MAX_IN_FLIGHT = 50
+
+# Balkengröße in Sekunden, bis zu der IB das 10-Minuten-Limit und die Sperre
+# für identische Anfragen anwendet
+SMALL_BAR_SECONDS = 30
+
+_BAR_UNIT_SECONDS = {"sec": 1, "min": 60, "hour": 3600, "day": 86400, "week": 604800, "month": 2592000}
+
+
+class HistoricalDataError(Exception):
+    """
+    Raised when IB answers a historical data request with an error.
+    """
+
+    def __init__(self, reqId, errorCode, errorString):
+        super().__init__(f"Error {reqId}, Code: {errorCode}, Msg: {errorString}")
+        self.reqId = reqId
+        self.errorCode = errorCode
+        self.errorString = errorString
+
+
+def stock_contract(symbol, sec_type="STK", currency="USD", exchange="SMART"):
+    contract = Contract()
+    contract.symbol = symbol
+    contract.secType = sec_type
+    contract.currency = currency
+    contract.exchange = exchange
+    return contract
+
+
+class IBHistoryClient(EWrapper, EClient):
+    """
+    Single persistent IB connection that keeps many reqHistoricalData
+    requests in flight at once.
+
+    Every request gets its own reqId and a Future; the bars arriving on the
+    message thread are routed by reqId and the Future is resolved on
+    historicalDataEnd (or failed on an error for that reqId). Bulk requests
+    are paced by a PacingScheduler.
+    """
+
+    def __init__(self, max_in_flight=MAX_IN_FLIGHT):
+        EClient.__init__(self, self)
+        self.nextReqId = 1
+        self.connected_event = threading.Event()
+        self.lock = threading.Lock()
+        self.bars = {}
+        self.futures = {}
+        self.max_in_flight = max_in_flight
+        self.thread = None
+        self.scheduler = None
+
+    def start(self, host="127.0.0.1", port=4002, clientId=1, timeout=10):
+        """
+        Connects to TWS/IB Gateway and starts the message loop in a daemon thread.
+
+        Args:
+            host (str): The host of TWS/IB Gateway.
+            port (int): The API port.
+            clientId (int): The API client id.
+            timeout (float): Seconds to wait for the connection handshake.
+        """
+        self.connect(host, port, clientId)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        if not self.connected_event.wait(timeout=timeout):
+            raise ConnectionError(f"Keine Verbindung zu {host}:{port} innerhalb von {timeout} s")
+        self.scheduler = PacingScheduler(self, max_in_flight=self.max_in_flight)
+        return self
+
+    def stop(self):
+        """
+        Disconnects and fails all requests that are still pending.
+        """
+        if self.scheduler is not None:
+            self.scheduler.stop()
+        self.disconnect()
+        with self.lock:
+            pending = list(self.futures.items())
+            self.futures.clear()
+            self.bars.clear()
+        for reqId, future in pending:
+            future.set_exception(ConnectionError(f"Verbindung getrennt, Anfrage {reqId} abgebrochen"))
+
+    def nextValidId(self, orderId):
+        super().nextValidId(orderId)
+        self.connected_event.set()
+
+    def error(self, reqId, errorCode, errorString, advancedOrderReject=""):
+        if errorCode in INFO_CODES:
+            return
+        if not self._finish(reqId, exception=HistoricalDataError(reqId, errorCode, errorString)):
+            print(f"Error {reqId}, Code: {errorCode}, Msg: {errorString}")
+
+    def historicalData(self, reqId, bar):
+        with self.lock:
+            if reqId in self.bars:
+                self.bars[reqId].append(bar)
+
+    def historicalDataEnd(self, reqId, start, end):
+        self._finish(reqId)
+
+    def _finish(self, reqId, exception=None):
+        """
+        Resolves the Future of a request.
+
+        Returns:
+            bool: False if the reqId does not belong to a pending request.
+        """
+        with self.lock:
+            future = self.futures.pop(reqId, None)
+            bars = self.bars.pop(reqId, [])
+        if future is None:
+            return False
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(bars)
+        return True
+
+    def request_history(self, contract, endDateTime="", durationStr="1 Y", barSizeSetting="1 day",
+                        whatToShow="TRADES", useRTH=1):
+        """
+        Sends a reqHistoricalData request without waiting for the answer.
+
+        Args:
+            contract (Contract): The contract to request.
+            endDateTime (str): End of the period ("" for now).
+            durationStr (str): IB duration string, e.g. "1 Y" or "1 D".
+            barSizeSetting (str): IB bar size, e.g. "1 day".
+            whatToShow (str): TRADES, MIDPOINT, BID, ASK, ...
+            useRTH (int): 1 for regular trading hours only.
+
+        Returns:
+            Future: Resolves to the list of BarData of the request.
+        """
+        future = Future()
+        with self.lock:
+            reqId = self.nextReqId
+            self.nextReqId += 1
+            self.bars[reqId] = []
+            self.futures[reqId] = future
+        future.reqId = reqId
+        self.reqHistoricalData(reqId, contract, endDateTime, durationStr, barSizeSetting,
+                               whatToShow, useRTH, 1, False, [])
+        return future
+
+    def cancel(self, future):
+        """
+        Cancels a pending request and fails its Future.
+        """
+        if self._finish(future.reqId, exception=FutureTimeoutError(f"Anfrage {future.reqId} abgebrochen")):
+            self.cancelHistoricalData(future.reqId)
+
+    def fetch_histories(self, symbols, timeout=60, **request_kwargs):
+        """
+        Requests the historical bars of many symbols over the one connection.
+
+        The requests go through the pacing scheduler, which keeps as many of
+        them in flight as IB's pacing rules allow.
+
+        Args:
+            symbols (list): A list of stock symbols.
+            timeout (float): Seconds after which an unanswered request is cancelled.
+            **request_kwargs: Passed on to request_history (durationStr, whatToShow, ...).
+
+        Returns:
+            dict: The list of BarData per symbol (failed symbols map to None).
+        """
+        return self.scheduler.fetch_histories(symbols, timeout=timeout, **request_kwargs)
+
+
+def bar_seconds(barSizeSetting):
+    """
+    Converts an IB bar size such as "30 secs", "5 mins" or "1 day" into seconds.
+    """
+    count, unit = barSizeSetting.split()
+    for prefix, seconds in _BAR_UNIT_SECONDS.items():
+        if unit.startswith(prefix):
+            return int(count) * seconds
+    raise ValueError(f"Unknown bar size: {barSizeSetting}")
+
+
+def _duration_days(durationStr):
+    """
+    Converts an IB duration string ("30 D", "6 M", "1 Y") into an upper bound in days.
+    """
+    count, unit = durationStr.split()
+    days_per_unit = {"S": 1 / 86400, "D": 1, "W": 7, "M": 31, "Y": 366}
+    return int(count) * days_per_unit[unit.upper()]
+
+
+def _bar_date(bar):
+    """
+    Returns the calendar day of a daily/weekly/monthly bar ("YYYYMMDD..." format).
+    """
+    return datetime.strptime(str(bar.date)[:8], "%Y%m%d").date()
+
+
+def trim_bars(bars, durationStr, endDateTime=""):
+    """
+    Cuts a longer series of daily (or coarser) bars down to a shorter IB duration.
+
+    "N D" keeps the last N bars (IB counts trading days); W/M/Y keep the bars
+    inside the calendar period before the end date.
+
+    Args:
+        bars (list): BarData of the longer request, oldest first.
+        durationStr (str): The shorter IB duration.
+        endDateTime (str): End of the period ("" for now).
+
+    Returns:
+        list: The bars that fall into the shorter duration.
+    """
+    count, unit = durationStr.split()
+    count, unit = int(count), unit.upper()
+    if unit == "D":
+        return bars[-count:]
+    end_date = datetime.strptime(endDateTime[:8], "%Y%m%d").date() if endDateTime else datetime.now().date()
+    days = {"W": 7, "M": 30, "Y": 365}[unit] * count
+    cutoff = end_date - timedelta(days=days)
+    return [bar for bar in bars if cutoff < _bar_date(bar) <= end_date]
+
+
+def closes_at_offsets(bars, day_offsets, as_of=None, tolerance_days=7):
+    """
+    Picks look-back closes out of one daily series instead of requesting each date.
+
+    Each target day (as_of minus the offset) is snapped to the nearest
+    trading day in the series; on a tie the earlier bar wins.
+
+    Args:
+        bars (list): Daily BarData, oldest first (e.g. one "1 Y" request).
+        day_offsets (list): Calendar days to look back, e.g. [0, 90, 180, 270, 360].
+        as_of (date): The reference day, defaults to today.
+        tolerance_days (int): Maximum distance between target and bar.
+
+    Returns:
+        dict: The close per offset (None if no bar is close enough).
+    """
+    as_of = as_of or datetime.now().date()
+    dates = [_bar_date(bar) for bar in bars]
+    closes = {}
+    for offset in day_offsets:
+        target = as_of - timedelta(days=offset)
+        i = bisect_right(dates, target)
+        candidates = [j for j in (i - 1, i) if 0 <= j < len(dates)]
+        if not candidates:
+            closes[offset] = None
+            continue
+        j = min(candidates, key=lambda k: (abs((dates[k] - target).days), k))
+        closes[offset] = bars[j].close if abs((dates[j] - target).days) <= tolerance_days else None
+    return closes
+
+
+class _HistoryJob:
+    """
+    One reqHistoricalData call managed by the PacingScheduler, possibly
+    shared by several callers (waiters) asking for the same or a shorter period.
+    """
+
+    def __init__(self, key, contract, durationStr, timeout):
+        self.key = key
+        self.contract = contract
+        self.durationStr = durationStr
+        self.timeout = timeout
+        self.waiters = []
+        self.attempts = 0
+        self.not_before = 0.0
+        self.sent_at = None
+        self.client_future = None
+        # Nur Balken bis 30 Sekunden unterliegen dem 10-Minuten-Limit
+        self.small_bars = bar_seconds(key[5]) <= SMALL_BAR_SECONDS
+
+
+class PacingScheduler:
+    """
+    Queues historical data requests and sends them as fast as IB's pacing
+    rules allow:
+
+    - at most `contract_burst` requests for the same contract within `burst_window` seconds,
+    - at most `max_in_flight` unanswered requests,
+    - for bars of SMALL_BAR_SECONDS or less only: no identical request within
+      `identical_interval` seconds and at most `max_requests` such requests
+      within `window` seconds (IB does not apply these two to larger bars,
+      so daily bulk downloads are not slowed down by them).
+
+    Identical requests and requests for a shorter period of a queued or
+    running request (same contract, end, bar size and data type) are
+    coalesced into one call; results are kept for `recent_ttl` seconds and
+    reused. Pacing violations reported by IB are retried after a pause
+    instead of failing. stop() fails every request that is still queued.
+    """
+
+    def __init__(self, client, max_requests=60, window=600, identical_interval=15, contract_burst=5,
+                 burst_window=2, max_in_flight=MAX_IN_FLIGHT, recent_ttl=60, max_retries=3):
+        self.client = client
+        self.max_requests = max_requests
+        self.window = window
+        self.identical_interval = identical_interval
+        self.contract_burst = contract_burst
+        self.burst_window = burst_window
+        self.max_in_flight = max_in_flight
+        self.recent_ttl = recent_ttl
+        self.max_retries = max_retries
+        self.cond = threading.Condition()
+        self.queue = deque()
+        self.jobs = {}
+        self.in_flight = set()
+        self.recent = {}
+        # Sendezeiten der Anfragen mit Balken bis 30 Sekunden (10-Minuten-Limit)
+        self.sent = deque()
+        self.sent_by_contract = {}
+        self.last_sent = {}
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stops the scheduler thread and fails all queued requests with a ConnectionError.
+
+        Requests already sent are resolved by the client (see IBHistoryClient.stop()).
+        """
+        with self.cond:
+            self.running = False
+            queued = list(self.queue)
+            self.queue.clear()
+            for job in queued:
+                if self.jobs.get(job.key) is job:
+                    del self.jobs[job.key]
+            self.cond.notify_all()
+        for job in queued:
+            error = ConnectionError(f"Scheduler gestoppt, Anfrage für {job.contract.symbol} abgebrochen")
+            for future, _ in job.waiters:
+                future.set_exception(error)
+
+    def submit(self, contract, endDateTime="", durationStr="1 Y", barSizeSetting="1 day",
+               whatToShow="TRADES", useRTH=1, timeout=60):
+        """
+        Queues a historical data request.
+
+        Args:
+            contract (Contract): The contract to request.
+            endDateTime (str): End of the period ("" for now).
+            durationStr (str): IB duration string, e.g. "1 Y" or "1 D".
+            barSizeSetting (str): IB bar size, e.g. "1 day".
+            whatToShow (str): TRADES, MIDPOINT, BID, ASK, ...
+            useRTH (int): 1 for regular trading hours only.
+            timeout (float): Seconds after sending until the request is cancelled.
+
+        Returns:
+            Future: Resolves to the list of BarData of the request.
+        """
+        key = (contract.symbol, contract.secType, contract.exchange, contract.currency,
+               endDateTime, barSizeSetting, whatToShow, useRTH)
+        trimmable = barSizeSetting in ("1 day", "1 week", "1 month")
+        future = Future()
+        with self.cond:
+            if not self.running:
+                future.set_exception(ConnectionError(f"Scheduler gestoppt, Anfrage für {contract.symbol} abgelehnt"))
+                return future
+            now = time.monotonic()
+            recent = self.recent.get(key)
+            if recent is not None and now - recent[0] > self.recent_ttl:
+                del self.recent[key]
+            elif recent is not None:
+                _, recent_duration, bars = recent
+                if recent_duration == durationStr:
+                    future.set_result(bars)
+                    return future
+                if trimmable and _duration_days(recent_duration) >= _duration_days(durationStr):
+                    future.set_result(trim_bars(bars, durationStr, endDateTime))
+                    return future
+
+            job = self.jobs.get(key)
+            if job is not None and (job.durationStr == durationStr or trimmable):
+                if job.sent_at is None and _duration_days(durationStr) > _duration_days(job.durationStr):
+                    # Noch nicht gesendet: Anfrage auf den längeren Zeitraum erweitern
+                    job.durationStr = durationStr
+                if _duration_days(job.durationStr) >= _duration_days(durationStr):
+                    job.waiters.append((future, durationStr))
+                    return future
+
+            job = _HistoryJob(key, contract, durationStr, timeout)
+            job.waiters.append((future, durationStr))
+            # Auch eine längere Anfrage neben einer bereits laufenden eintragen, damit spätere
+            # Anfragen sich ihr anschließen können
+            self.jobs[key] = job
+            self.queue.append(job)
+            self.cond.notify_all()
+        return future
+
+    def fetch_histories(self, symbols, timeout=60, **request_kwargs):
+        """
+        Requests the historical bars of many symbols and waits for all of them.
+
+        Args:
+            symbols (list): A list of stock symbols.
+            timeout (float): Seconds after sending until a request is cancelled.
+            **request_kwargs: Passed on to submit (durationStr, whatToShow, ...).
+
+        Returns:
+            dict: The list of BarData per symbol (failed symbols map to None).
+        """
+        futures = {symbol: self.submit(stock_contract(symbol), timeout=timeout, **request_kwargs)
+                   for symbol in symbols}
+        results = {}
+        for symbol, future in futures.items():
+            try:
+                results[symbol] = future.result()
+            except (HistoricalDataError, FutureTimeoutError, ConnectionError) as e:
+                print(f"Fehler beim Abrufen von {symbol}: {e}")
+                results[symbol] = None
+        return results
+
+    def _purge(self, now):
+        while self.sent and now - self.sent[0] >= self.window:
+            self.sent.popleft()
+        for contract_key, timestamps in list(self.sent_by_contract.items()):
+            while timestamps and now - timestamps[0] >= self.burst_window:
+                timestamps.popleft()
+            if not timestamps:
+                del self.sent_by_contract[contract_key]
+        for request_key, sent_at in list(self.last_sent.items()):
+            if now - sent_at >= self.identical_interval:
+                del self.last_sent[request_key]
+        for request_key, (received_at, _, _) in list(self.recent.items()):
+            if now - received_at > self.recent_ttl:
+                del self.recent[request_key]
+
+    def _next_sendable(self, now):
+        """
+        Returns the first queued job that may be sent now without breaking a pacing rule.
+        """
+        if len(self.in_flight) >= self.max_in_flight:
+            return None
+        for job in self.queue:
+            if job.not_before > now:
+                continue
+            if len(self.sent_by_contract.get(job.key[:4], ())) >= self.contract_burst:
+                continue
+            if job.small_bars and (len(self.sent) >= self.max_requests or (job.key, job.durationStr) in self.last_sent):
+                continue
+            return job
+        return None
+
+    def _run(self):
+        while True:
+            expired = []
+            with self.cond:
+                if not self.running:
+                    return
+                now = time.monotonic()
+                self._purge(now)
+                for job in self.in_flight:
+                    if now - job.sent_at > job.timeout:
+                        expired.append(job)
+                job = self._next_sendable(now)
+                if job is not None:
+                    self.queue.remove(job)
+                    self.in_flight.add(job)
+                    job.sent_at = now
+                    self.sent_by_contract.setdefault(job.key[:4], deque()).append(now)
+                    if job.small_bars:
+                        self.sent.append(now)
+                        self.last_sent[(job.key, job.durationStr)] = now
+                elif not expired:
+                    self.cond.wait(timeout=0.25)
+                    continue
+
+            for expired_job in expired:
+                print(f"Zeitüberschreitung beim Abrufen von {expired_job.contract.symbol}")
+                self.client.cancel(expired_job.client_future)
+            if job is not None:
+                self._send(job)
+
+    def _send(self, job):
+        contract = job.contract
+        _, _, _, _, endDateTime, barSizeSetting, whatToShow, useRTH = job.key
+        try:
+            job.client_future = self.client.request_history(contract, endDateTime, job.durationStr,
+                                                            barSizeSetting, whatToShow, useRTH)
+        except Exception as e:
+            job.client_future = Future()
+            job.client_future.set_exception(e)
+        job.client_future.add_done_callback(lambda client_future, job=job: self._on_done(job, client_future))
+
+    def _on_done(self, job, client_future):
+        error = client_future.exception()
+        with self.cond:
+            self.in_flight.discard(job)
+            if (self.running and isinstance(error, HistoricalDataError) and "pacing" in error.errorString.lower()
+                    and job.attempts < self.max_retries):
+                # Pacing-Verletzung: mit Pause erneut einreihen statt abzubrechen
+                job.attempts += 1
+                job.sent_at = None
+                job.not_before = time.monotonic() + self.identical_interval * job.attempts
+                self.queue.appendleft(job)
+                self.cond.notify_all()
+                return
+            if self.jobs.get(job.key) is job:
+                del self.jobs[job.key]
+            if error is None:
+                self.recent[job.key] = (time.monotonic(), job.durationStr, client_future.result())
+            self.cond.notify_all()
+
+        endDateTime = job.key[4]
+        for future, durationStr in job.waiters:
+            if error is not None:
+                future.set_exception(error)
+            elif durationStr == job.durationStr:
+                future.set_result(client_future.result())
+            else:
+                future.set_result(trim_bars(client_future.result(), durationStr, endDateTime))
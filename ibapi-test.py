@@ -1,9 +1,9 @@
 from ibapi.client import *
 from ibapi.wrapper import *
 from ibapi.contract import Contract
-import datetime
 import time
 import threading
+from ib_history import closes_at_offsets
  
 port = 4002  # Geänderter Port
  
@@ -59,28 +59,15 @@ def get_last_and_year_ago_close(symbol):
     contract.exchange = "SMART"
     contract.currency = "USD"
  
-    current_date = datetime.datetime.now().strftime("%Y%m%d %H:%M:%S")
-    one_year_ago_date = (datetime.datetime.now() - datetime.timedelta(days=365)).strftime("%Y%m%d %H:%M:%S")
-   
-    app.reqId = app.nextId()
-    app.reqHistoricalData(app.reqId, contract, current_date, "1 D", "1 day", "TRADES", 1, 1, False, [])
-    app.event.clear()
-    app.event.wait(timeout=60)
-   
-    if app.reqId in app.data:
-        last_close = app.data[app.reqId][-1].close
-    else:
-        last_close = None
-   
+    # Eine 1-Jahres-Tagesreihe statt zwei Einzelabfragen; beide Kurse werden lokal entnommen
     app.reqId = app.nextId()
-    app.reqHistoricalData(app.reqId, contract, one_year_ago_date, "1 D", "1 day", "TRADES", 1, 1, False, [])
     app.event.clear()
+    app.reqHistoricalData(app.reqId, contract, "", "1 Y", "1 day", "TRADES", 1, 1, False, [])
     app.event.wait(timeout=60)
    
-    if app.reqId in app.data:
-        year_ago_close = app.data[app.reqId][-1].close
-    else:
-        year_ago_close = None
+    closes = closes_at_offsets(app.data.get(app.reqId, []), [0, 365])
+    last_close = closes[0]
+    year_ago_close = closes[365]
    
     app.disconnect()
    
@@ -0,0 +1,182 @@
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+# Verzeichnis der optionalen Festplattenstufe des Indikator-Caches
+INDICATOR_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "indicator_cache")
+
+# Maximale Anzahl von Indikator-Ergebnissen im Arbeitsspeicher
+MAX_ENTRIES = 1024
+
+
+def bars_fingerprint(data):
+    """
+    Identifies the bars an indicator was computed from.
+
+    Besides the last bar timestamp the fingerprint contains the number of
+    bars and the first and last close, so a longer history or a dividend
+    adjustment of older bars also leads to a new key.
+
+    Args:
+        data (DataFrame): A DataFrame with historical data.
+
+    Returns:
+        tuple: (number of bars, first bar, last bar, first close, last close).
+    """
+    if data is None or data.empty:
+        return (0,)
+    return (len(data), str(data.index[0]), str(data.index[-1]),
+            float(data['Close'].iloc[0]), float(data['Close'].iloc[-1]))
+
+
+class IndicatorCache:
+    """
+    Memoizes indicator results per (symbol, bars, indicator name, parameters).
+
+    Results are kept in a size-bounded LRU in memory. With `directory` set,
+    each result is also pickled to disk, so repeated scans in new processes
+    only recompute indicators for symbols with new data. Only the newest
+    result per symbol, indicator and parameters is kept on disk.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, directory=None):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, symbol, data, name, params):
+        return (str(symbol), bars_fingerprint(data), name, tuple(sorted(params.items())))
+
+    def _prefix(self, key):
+        """
+        Returns the file name prefix shared by all bars of one indicator and parameter set.
+        """
+        params_digest = hashlib.sha1(repr(key[3]).encode()).hexdigest()[:12]
+        return f"{key[2]}_{params_digest}_"
+
+    def _path(self, key):
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        safe_symbol = key[0].strip().upper().replace("/", "_")
+        return os.path.join(self.directory, safe_symbol, f"{self._prefix(key)}{digest}.pkl")
+
+    def _remove_outdated(self, key):
+        """
+        Deletes the files of the same symbol, indicator and parameters computed from older bars.
+        """
+        path = self._path(key)
+        symbol_dir, current = os.path.split(path)
+        prefix = self._prefix(key)
+        for name in os.listdir(symbol_dir):
+            if name.startswith(prefix) and name.endswith(".pkl") and name != current:
+                try:
+                    os.remove(os.path.join(symbol_dir, name))
+                except OSError:
+                    pass
+
+    def _remember(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get(self, symbol, data, name, **params):
+        """
+        Looks up a cached indicator result.
+
+        Args:
+            symbol (str): The stock symbol.
+            data (DataFrame): The bars the indicator is computed from.
+            name (str): The indicator name, e.g. 'SMA'.
+            **params: The indicator parameters, e.g. window=50.
+
+        Returns:
+            The cached result, or None if it is not cached.
+        """
+        key = self._key(symbol, data, name, params)
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+        if self.directory is not None and os.path.exists(self._path(key)):
+            try:
+                with open(self._path(key), "rb") as f:
+                    value = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError) as e:
+                print(f"Fehler beim Lesen des Indikator-Caches für {symbol}: {e}")
+            else:
+                self._remember(key, value)
+                with self.lock:
+                    self.hits += 1
+                return value
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def put(self, symbol, data, name, value, **params):
+        """
+        Stores an indicator result in memory and, if enabled, on disk.
+        """
+        key = self._key(symbol, data, name, params)
+        self._remember(key, value)
+        if self.directory is not None:
+            path = self._path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(value, f)
+            os.replace(tmp_path, path)
+            self._remove_outdated(key)
+
+    def compute(self, symbol, data, name, function, **params):
+        """
+        Returns the cached result or computes and stores it.
+
+        Args:
+            symbol (str): The stock symbol (None disables caching).
+            data (DataFrame): The bars the indicator is computed from.
+            name (str): The indicator name.
+            function (callable): Called as function(data, **params) on a miss.
+            **params: The indicator parameters.
+
+        Returns:
+            The indicator result.
+        """
+        if symbol is None:
+            return function(data, **params)
+        value = self.get(symbol, data, name, **params)
+        if value is None:
+            value = function(data, **params)
+            self.put(symbol, data, name, value, **params)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+DEFAULT_CACHE = IndicatorCache()
+
+
+def cached_indicator(symbol, data, name, function, cache=None, **params):
+    """
+    Computes an indicator through the shared (or the given) IndicatorCache.
+
+    Args:
+        symbol (str): The stock symbol (None disables caching).
+        data (DataFrame): The bars the indicator is computed from.
+        name (str): The indicator name.
+        function (callable): Called as function(data, **params) on a miss.
+        cache (IndicatorCache): The cache to use, defaults to DEFAULT_CACHE.
+        **params: The indicator parameters.
+
+    Returns:
+        The indicator result.
+    """
+    return (cache or DEFAULT_CACHE).compute(symbol, data, name, function, **params)
@@ -0,0 +1,469 @@
+import warnings
+
+import numpy as np
+
+# Gleitende Durchschnitte von calculate_indicators() in get Stock Info.py
+SMA_WINDOWS = (5, 10, 20, 50, 100, 200)
+
+# Zeiträume für Highest High / Lowest Low (HH<n>, LL<n>) in get Stock Info.py
+RANGE_WINDOWS = (10, 21)
+
+
+def stack_right_aligned(histories, field):
+    """
+    Stacks one field of many symbols into a 2-D (bar × symbol) array.
+
+    The series are aligned on their last bar, shorter histories are padded
+    with NaN at the top. Every rolling window therefore covers the same bars
+    as a per-symbol pandas rolling() call on that symbol's own DataFrame.
+    For a PricePanel only the days on which a symbol has a close are
+    stacked, so a missing day does not blank out the windows around it.
+
+    Args:
+        histories (dict): A DataFrame with historical data per symbol, or a PricePanel.
+        field (str): The column to stack, e.g. 'Close'.
+
+    Returns:
+        ndarray: A float64 array of shape (longest history, number of symbols).
+    """
+    if hasattr(histories, "field"):
+        # PricePanel: nur die Handelstage des jeweiligen Symbols stapeln
+        rows = _panel_rows(histories)
+        array = histories.field(field)
+        length = max((len(symbol_rows) for symbol_rows in rows), default=0)
+        values = np.full((length, len(rows)), np.nan)
+        for j, symbol_rows in enumerate(rows):
+            values[length - len(symbol_rows):, j] = array[symbol_rows, j]
+        return values
+    length = max((len(data) for data in histories.values()), default=0)
+    values = np.full((length, len(histories)), np.nan)
+    for j, data in enumerate(histories.values()):
+        if len(data):
+            values[length - len(data):, j] = data[field].to_numpy(dtype=np.float64)
+    return values
+
+
+def _panel_rows(panel):
+    """
+    Returns the panel rows of every symbol (the days with a close).
+    """
+    close = panel.field('Close')
+    return [np.flatnonzero(~np.isnan(close[:, j])) for j in range(close.shape[1])]
+
+
+def unstack_to_panel(panel, values):
+    """
+    Puts right-aligned (bar × symbol) results back on the rows of a PricePanel;
+    the inverse of stack_right_aligned() for a panel.
+
+    Args:
+        panel (PricePanel): The panel the inputs were stacked from.
+        values (ndarray): Results of the panel's shape after stacking.
+
+    Returns:
+        ndarray: The results on the panel's trading days, NaN on days without a bar.
+    """
+    rows = _panel_rows(panel)
+    result = np.full((len(panel.days), len(rows)), np.nan)
+    for j, symbol_rows in enumerate(rows):
+        if len(symbol_rows):
+            result[symbol_rows, j] = values[len(values) - len(symbol_rows):, j]
+    return result
+
+
+def _as_2d(values):
+    values = np.asarray(values, dtype=np.float64)
+    return values.reshape(-1, 1) if values.ndim == 1 else values
+
+
+def _window_sums(values, window):
+    """
+    Returns the rolling sums and the number of valid values per window,
+    both computed from cumulative sums along the bar axis.
+    """
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    zeros = np.zeros((1,) + values.shape[1:])
+    sums = np.concatenate([zeros, np.cumsum(filled, axis=0)])
+    counts = np.concatenate([zeros, np.cumsum(valid, axis=0)])
+    window_sums = np.full(values.shape, np.nan)
+    window_counts = np.zeros(values.shape)
+    if window <= len(values):
+        window_sums[window - 1:] = sums[window:] - sums[:-window]
+        window_counts[window - 1:] = counts[window:] - counts[:-window]
+    return window_sums, window_counts
+
+
+def rolling_mean(values, window):
+    """
+    Rolling mean over the bar axis of a 1-D or 2-D array in one pass.
+
+    Like pandas rolling(window).mean(), a window containing NaN yields NaN.
+
+    Args:
+        values (ndarray): Prices with bars along axis 0.
+        window (int): The window size.
+
+    Returns:
+        ndarray: The rolling mean, same shape as a 2-D `values`.
+    """
+    values = _as_2d(values)
+    sums, counts = _window_sums(values, window)
+    return np.where(counts == window, sums / window, np.nan)
+
+
+def rolling_std(values, window, ddof=1):
+    """
+    Rolling standard deviation over the bar axis (sample std like pandas).
+
+    The values are centred on their column mean first, which keeps the
+    sum-of-squares formula numerically stable.
+
+    Args:
+        values (ndarray): Prices with bars along axis 0.
+        window (int): The window size.
+        ddof (int): Delta degrees of freedom.
+
+    Returns:
+        ndarray: The rolling standard deviation.
+    """
+    values = _as_2d(values)
+    with warnings.catch_warnings():
+        # Spalten ohne einen einzigen Kurs bleiben NaN
+        warnings.simplefilter("ignore", RuntimeWarning)
+        centred = values - np.nanmean(values, axis=0) if len(values) else values
+    sums, counts = _window_sums(centred, window)
+    squares, _ = _window_sums(centred ** 2, window)
+    variance = (squares - sums ** 2 / window) / (window - ddof)
+    return np.where(counts == window, np.sqrt(np.maximum(variance, 0.0)), np.nan)
+
+
+def _van_herk(values, window, ufunc, identity):
+    """
+    Running extremum over `window` bars with the van Herk/Gil-Werman scheme.
+
+    The bar axis is cut into blocks of `window` bars; prefix and suffix
+    extrema inside each block are accumulated once, and every window is
+    the combination of one suffix and one prefix. That costs three
+    operations per bar, independent of the window size, and is applied to
+    all symbols at once.
+    """
+    length, columns = values.shape
+    result = np.full(values.shape, np.nan)
+    if window > length:
+        return result
+    padding = np.full(((-length) % window, columns), identity)
+    blocks = np.concatenate([values, padding]).reshape(-1, window, columns)
+    prefix = ufunc.accumulate(blocks, axis=1).reshape(-1, columns)
+    suffix = ufunc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].reshape(-1, columns)
+    result[window - 1:] = ufunc(suffix[:length - window + 1], prefix[window - 1:length])
+    return result
+
+
+def rolling_max(values, window):
+    """
+    Rolling maximum over the bar axis in O(n) (NaN until the window is full).
+
+    Like pandas rolling(window).max(), a window containing NaN yields NaN.
+    """
+    return _van_herk(_as_2d(values), window, np.maximum, -np.inf)
+
+
+def rolling_min(values, window):
+    """
+    Rolling minimum over the bar axis in O(n) (NaN until the window is full).
+    """
+    return _van_herk(_as_2d(values), window, np.minimum, np.inf)
+
+
+def rolling_extrema(high, low=None, windows=(9, 26, 52)):
+    """
+    Rolling highs and lows for several window lengths at once.
+
+    Args:
+        high (ndarray): Highs with bars along axis 0 and one column per symbol.
+        low (ndarray): Lows, same shape (defaults to `high`, e.g. for closes).
+        windows (tuple): The window sizes.
+
+    Returns:
+        dict: (highest high, lowest low) arrays per window size.
+    """
+    high = _as_2d(high)
+    low = high if low is None else _as_2d(low)
+    return {window: (rolling_max(high, window), rolling_min(low, window)) for window in windows}
+
+
+def distance_to_high(close, high, window=252):
+    """
+    Distance of the close to the highest high of the last `window` bars.
+
+    Args:
+        close (ndarray): Closes with bars along axis 0.
+        high (ndarray): Highs, same shape.
+        window (int): The look-back, 252 bars for the 52-week high.
+
+    Returns:
+        ndarray: The distance in percent (0 at a new high, negative below it).
+    """
+    return (_as_2d(close) / rolling_max(high, window) - 1) * 100
+
+
+def shift(values, periods):
+    """
+    Shifts values forward along the bar axis like pandas shift(periods).
+    """
+    values = _as_2d(values)
+    result = np.full(values.shape, np.nan)
+    if periods < len(values):
+        result[periods:] = values[:len(values) - periods]
+    return result
+
+
+def true_range(high, low, close):
+    """
+    True range of every bar for all symbols at once.
+
+    The first bar of a series (no previous close) uses high - low.
+
+    Args:
+        high (ndarray): Highs with bars along axis 0.
+        low (ndarray): Lows, same shape.
+        close (ndarray): Closes, same shape.
+
+    Returns:
+        ndarray: The true range per bar and symbol.
+    """
+    high, low = _as_2d(high), _as_2d(low)
+    previous_close = shift(close, 1)
+    return np.fmax(high, previous_close) - np.fmin(low, previous_close)
+
+
+def _smooth(values, window, alpha):
+    """
+    Exponential smoothing along the bar axis, seeded with the first full
+    window's mean of each column. The recursion runs over bars, each step
+    updates all symbols at once.
+    """
+    seed = rolling_mean(values, window)
+    result = np.full(values.shape, np.nan)
+    previous = np.full(values.shape[1], np.nan)
+    for i in range(len(values)):
+        previous = np.where(np.isnan(previous), seed[i], previous + alpha * (values[i] - previous))
+        result[i] = previous
+    return result
+
+
+def average_true_range(high, low, close, period=21, method="simple"):
+    """
+    Average True Range series for all symbols at once.
+
+    Args:
+        high (ndarray): Highs with bars along axis 0 and one column per symbol.
+        low (ndarray): Lows, same shape.
+        close (ndarray): Closes, same shape.
+        period (int): The ATR period.
+        method (str): "simple" (mean of the last `period` true ranges),
+            "wilder" (Wilder's smoothing, alpha = 1 / period) or
+            "ema" (alpha = 2 / (period + 1)).
+
+    Returns:
+        ndarray: The ATR per bar and symbol (NaN until `period` bars exist).
+    """
+    tr = true_range(high, low, close)
+    if method == "simple":
+        return rolling_mean(tr, period)
+    if method == "wilder":
+        return _smooth(tr, period, 1.0 / period)
+    if method == "ema":
+        return _smooth(tr, period, 2.0 / (period + 1))
+    raise ValueError(f"Unknown ATR method: {method}")
+
+
+def latest_atr(histories, period=21, method="simple"):
+    """
+    Current ATR of many symbols, e.g. for the stop-loss prices of a watchlist.
+
+    Args:
+        histories (dict): A DataFrame with historical data per symbol, or a PricePanel.
+        period (int): The ATR period.
+        method (str): "simple", "wilder" or "ema".
+
+    Returns:
+        dict: The ATR of the last bar per symbol.
+    """
+    atr = average_true_range(stack_right_aligned(histories, 'High'), stack_right_aligned(histories, 'Low'),
+                             stack_right_aligned(histories, 'Close'), period, method)
+    return dict(zip(histories, atr[-1])) if len(atr) else {}
+
+
+def current_atr(high, low, close, period=21, method="simple"):
+    """
+    Current ATR of one symbol, e.g. for the stop-loss price of a single order.
+
+    Histories shorter than `period` use all bars that exist.
+
+    Args:
+        high (list): Highs of one symbol, oldest first.
+        low (list): Lows, same length.
+        close (list): Closes, same length.
+        period (int): The ATR period.
+        method (str): "simple", "wilder" or "ema".
+
+    Returns:
+        float: The ATR of the last bar.
+    """
+    return average_true_range(high, low, close, min(period, len(close)), method)[-1, 0]
+
+
+def rsi(close, period=14):
+    """
+    Wilder's Relative Strength Index for all symbols at once.
+
+    The average gain and loss are seeded with the mean of the first
+    `period` price changes and then smoothed with alpha = 1 / period.
+
+    Args:
+        close (ndarray): Closes with bars along axis 0 and one column per symbol.
+        period (int): The RSI period.
+
+    Returns:
+        ndarray: The RSI (0-100) per bar and symbol, NaN for the first `period` bars.
+    """
+    close = _as_2d(close)
+    change = close - shift(close, 1)
+    average_gain = _smooth(np.clip(change, 0, None), period, 1.0 / period)
+    average_loss = _smooth(np.clip(-change, 0, None), period, 1.0 / period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(average_loss == 0, 100.0, 100 - 100 / (1 + average_gain / average_loss))
+
+
+def stoch_rsi(close, rsi_period=14, stoch_period=14, signal_period=3, smooth_period=1):
+    """
+    Stochastic RSI: the position of the RSI within its recent range.
+
+    Args:
+        close (ndarray): Closes with bars along axis 0 and one column per symbol.
+        rsi_period (int): The RSI period.
+        stoch_period (int): The look-back of the RSI high/low.
+        signal_period (int): The SMA period of the signal line.
+        smooth_period (int): The SMA period applied to the raw Stochastic RSI.
+
+    Returns:
+        tuple: Stochastic RSI (0-100) and signal line arrays.
+    """
+    values = rsi(close, rsi_period)
+    highest, lowest = rolling_extrema(values, windows=(stoch_period,))[stoch_period]
+    spread = highest - lowest
+    with np.errstate(divide="ignore", invalid="ignore"):
+        stoch = np.where(spread > 0, (values - lowest) / spread * 100, 0.0)
+    stoch = np.where(np.isnan(spread), np.nan, stoch)
+    if smooth_period > 1:
+        stoch = rolling_mean(stoch, smooth_period)
+    return stoch, rolling_mean(stoch, signal_period)
+
+
+def candle_counts(close, window):
+    """
+    Number of green and red candles (close above / below the previous close)
+    within the last `window` candles, for every bar and symbol at once.
+
+    Args:
+        close (ndarray): Closes with bars along axis 0 and one column per symbol.
+        window (int): The number of candles.
+
+    Returns:
+        tuple: Arrays of green and red counts (NaN until `window` + 1 closes exist).
+    """
+    close = _as_2d(close)
+    change = close - shift(close, 1)
+    missing = np.isnan(change)
+    green, valid = _window_sums(np.where(missing, np.nan, change > 0), window)
+    red, _ = _window_sums(np.where(missing, np.nan, change < 0), window)
+    return np.where(valid == window, green, np.nan), np.where(valid == window, red, np.nan)
+
+
+def ichimoku(high, low):
+    """
+    Computes the Ichimoku lines for all symbols at once.
+
+    Args:
+        high (ndarray): Highs with bars along axis 0.
+        low (ndarray): Lows with bars along axis 0.
+
+    Returns:
+        dict: Tenkan_Sen, Kijun_Sen, Span_A and Span_B arrays.
+    """
+    extrema = rolling_extrema(high, low, (9, 26, 52))
+    tenkan_sen = (extrema[9][0] + extrema[9][1]) / 2
+    kijun_sen = (extrema[26][0] + extrema[26][1]) / 2
+    span_a = shift((tenkan_sen + kijun_sen) / 2, 26)
+    span_b = shift((extrema[52][0] + extrema[52][1]) / 2, 26)
+    return {'Tenkan_Sen': tenkan_sen, 'Kijun_Sen': kijun_sen, 'Span_A': span_a, 'Span_B': span_b}
+
+
+def compute_indicators(close, high, low, sma_windows=SMA_WINDOWS, range_windows=RANGE_WINDOWS):
+    """
+    Computes the indicator set of get Stock Info.py for all symbols at once.
+
+    Args:
+        close (ndarray): Closes with bars along axis 0 and one column per symbol.
+        high (ndarray): Highs, same shape.
+        low (ndarray): Lows, same shape.
+        sma_windows (tuple): The SMA window sizes.
+        range_windows (tuple): The window sizes of the highest high / lowest low.
+
+    Returns:
+        dict: SMA<n>, HH<n>/LL<n>, ATR21 (21-day range) and Bollinger Band arrays.
+    """
+    results = {f'SMA{window}': rolling_mean(close, window) for window in sma_windows}
+    extrema = rolling_extrema(high, low, tuple(set(range_windows) | {21}))
+    for window in range_windows:
+        results[f'HH{window}'], results[f'LL{window}'] = extrema[window]
+    results['ATR21'] = extrema[21][0] - extrema[21][1]
+    results['BB_middle'] = results['SMA20'] if 20 in sma_windows else rolling_mean(close, 20)
+    results['BB_std'] = rolling_std(close, 20)
+    results['BB_upper'] = results['BB_middle'] + 2 * results['BB_std']
+    results['BB_lower'] = results['BB_middle'] - 2 * results['BB_std']
+    return results
+
+
+def add_indicator_columns(histories, indicators):
+    """
+    Writes 2-D indicator arrays back as columns of the per-symbol DataFrames.
+
+    Args:
+        histories (dict): A DataFrame with historical data per symbol
+            (the order must match the columns of the arrays).
+        indicators (dict): Indicator arrays from stack_right_aligned() inputs.
+
+    Returns:
+        dict: A copy of each DataFrame with the indicator columns added.
+    """
+    frames = {}
+    for j, (symbol, data) in enumerate(histories.items()):
+        data = data.copy()
+        for name, values in indicators.items():
+            data[name] = values[len(values) - len(data):, j] if len(data) else []
+        frames[symbol] = data
+    return frames
+
+
+def calculate_indicators_batch(histories):
+    """
+    Adds the get Stock Info.py indicator columns to many symbols in one pass.
+
+    Args:
+        histories (dict): A DataFrame with historical data per symbol, or a PricePanel.
+
+    Returns:
+        dict: A DataFrame with indicator columns per symbol (a PricePanel with
+            float32 indicator fields if a panel was passed).
+    """
+    close = stack_right_aligned(histories, 'Close')
+    high = stack_right_aligned(histories, 'High')
+    low = stack_right_aligned(histories, 'Low')
+    indicators = compute_indicators(close, high, low)
+    if hasattr(histories, "with_fields"):
+        return histories.with_fields({name: unstack_to_panel(histories, values)
+                                      for name, values in indicators.items()})
+    return add_indicator_columns(histories, indicators)
@@ -0,0 +1,107 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from chart_patterns import scan_base_patterns, scan_cup_with_handle
+from price_matrix import PriceMatrix, build_price_matrix
+
+# Symbole pro Aufgabe eines Worker-Prozesses
+SHARD_SIZE = 25
+
+# Scan-Funktionen, die ein Worker-Prozess pro Symbol aufrufen kann
+SCANNERS = {
+    "cup_with_handle": scan_cup_with_handle,
+    "base_patterns": scan_base_patterns,
+}
+
+# Kursmatrix des Worker-Prozesses (einmal pro Prozess geöffnet)
+_worker_matrix = None
+
+
+def _init_worker(matrix_path):
+    global _worker_matrix
+    _worker_matrix = PriceMatrix(matrix_path)
+
+
+def _scan_shard(symbols, scanner, grid):
+    """
+    Scans a shard of symbols in a worker process.
+
+    Only the symbol names and the grid are pickled; the prices are read
+    from the memory-mapped matrix, which all workers share through the
+    operating system's page cache.
+    """
+    results = []
+    for symbol in symbols:
+        try:
+            matches = SCANNERS[scanner](_worker_matrix.frame(symbol).dropna(subset=['Close']), **grid)
+        except Exception as e:
+            print(f"Fehler beim Scannen von {symbol}: {e}")
+            continue
+        results.append((symbol, matches))
+    return results
+
+
+def iter_parallel_scan(matrix_path, symbols=None, max_workers=None, shard_size=SHARD_SIZE,
+                       scanner="cup_with_handle", **grid):
+    """
+    Scans the symbols of a price matrix for chart patterns on a process pool.
+
+    The symbol list is split into shards; every worker opens the matrix
+    memory-mapped once. Results are yielded as soon as a shard is done.
+
+    Args:
+        matrix_path (str): Directory of a price matrix (see price_matrix.py); built
+            with dtype=np.float64 the results match a scan of the original histories.
+        symbols (list): The symbols to scan (defaults to all symbols of the matrix).
+        max_workers (int): Number of worker processes (defaults to the number of cores).
+        shard_size (int): Number of symbols per task.
+        scanner (str): "cup_with_handle" (scan_cup_with_handle()) or
+            "base_patterns" (scan_base_patterns()).
+        **grid: Parameters of the scanner, e.g. cup_lengths=(30, 42).
+
+    Yields:
+        tuple: (symbol, DataFrame of matches) in order of completion.
+    """
+    if symbols is None:
+        symbols = PriceMatrix(matrix_path).symbols
+    shards = [symbols[i:i + shard_size] for i in range(0, len(symbols), shard_size)]
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(matrix_path,)) as executor:
+        futures = [executor.submit(_scan_shard, shard, scanner, grid) for shard in shards]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+def parallel_scan(histories, max_workers=None, shard_size=SHARD_SIZE, matrix_path=None,
+                  scanner="cup_with_handle", **grid):
+    """
+    Scans many histories for chart patterns on all cores.
+
+    The histories are written once into a memory-mapped float64 price
+    matrix (a temporary one unless `matrix_path` is given) instead of being
+    pickled to the workers, so the results are identical to a scan in this
+    process.
+
+    Args:
+        histories (dict): A DataFrame with historical data per symbol.
+        max_workers (int): Number of worker processes (defaults to the number of cores).
+        shard_size (int): Number of symbols per task.
+        matrix_path (str): Directory for the price matrix, e.g. price_matrix.MATRIX_DIR.
+        scanner (str): "cup_with_handle" or "base_patterns" (see SCANNERS).
+        **grid: Parameters of the scanner.
+
+    Returns:
+        DataFrame: All matches with a Symbol column.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = matrix_path or os.path.join(temp_dir, "price_matrix")
+        build_price_matrix(histories, path, dtype=np.float64)
+        matches = []
+        for symbol, found in iter_parallel_scan(path, None, max_workers, shard_size, scanner, **grid):
+            if not found.empty:
+                found.insert(0, "Symbol", symbol)
+                matches.append(found)
+    return pd.concat(matches, ignore_index=True) if matches else pd.DataFrame()
@@ -0,0 +1,216 @@
+import hashlib
+import os
+import pickle
+
+import numpy as np
+
+from chart_patterns import (CUP_DEPTH_THRESHOLD, HANDLE_DEPTH_THRESHOLD, UPTREND_THRESHOLD, VOLUME_WINDOW,
+                            _ForwardWindows, _cup_candidates, _prepare, _threshold_mask)
+from price_cache import REVISION_TOLERANCE
+
+# Verzeichnis der gespeicherten Musterzustände (eine Datei pro Symbol und Parametersatz)
+PATTERN_STATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pattern_state")
+
+# Version des gespeicherten Zustands; ältere Zustände werden neu berechnet
+STATE_VERSION = 2
+
+
+def latest_uptrend_start(close, start, uptrend_threshold=UPTREND_THRESHOLD):
+    """
+    Returns the latest day w for which the closes from w to the day before
+    `start` span at least `uptrend_threshold` (the uptrend rule of the cup).
+
+    The span only shrinks when w moves forward, so a formation stays valid
+    for every history that begins on or before day w.
+
+    Args:
+        close (ndarray): The closes, oldest first.
+        start (int): The start day of the cup.
+        uptrend_threshold (float): Minimum price range before the cup.
+
+    Returns:
+        int: The day w, or -1 if no history before `start` fulfils the rule.
+    """
+    before = close[:start][::-1]
+    highest = np.maximum.accumulate(before)
+    lowest = np.minimum.accumulate(before)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fulfilled = np.flatnonzero((highest - lowest) / lowest >= uptrend_threshold)
+    return start - 1 - fulfilled[0] if len(fulfilled) else -1
+
+
+class CupWithHandleState:
+    """
+    Per-symbol state of the "cup with handle" detector for daily scans.
+
+    Every new bar is the breakout day of exactly one new start day, so an
+    update only evaluates the last cup, handle and volume window of each
+    new bar instead of the whole history. The state keeps the formations
+    found so far together with the first days their uptrend rule and the
+    50-day average volume of their breakout need, and the close of the last
+    processed bar to recognize revised histories (split, dividend), which
+    trigger a full rescan.
+
+    The result matches cup_with_handle_starts() on the same history.
+    """
+
+    def __init__(self, cup_length=30, handle_length=None, cup_depth_threshold=CUP_DEPTH_THRESHOLD,
+                 handle_depth_threshold=HANDLE_DEPTH_THRESHOLD, uptrend_threshold=UPTREND_THRESHOLD):
+        self.cup_length = cup_length
+        self.handle_length = cup_length if handle_length is None else handle_length
+        self.cup_depth_threshold = cup_depth_threshold
+        self.handle_depth_threshold = handle_depth_threshold
+        self.uptrend_threshold = uptrend_threshold
+        self.first_date = None
+        # Letzter abgeschlossener Tag (der jüngste Tag kann sich intraday noch ändern)
+        self.through = None
+        self.through_close = None
+        self.formations = []
+        self.rescans = 0
+        self.version = STATE_VERSION
+
+    @property
+    def params(self):
+        return {"cup_length": self.cup_length, "handle_length": self.handle_length,
+                "cup_depth_threshold": self.cup_depth_threshold,
+                "handle_depth_threshold": self.handle_depth_threshold, "uptrend_threshold": self.uptrend_threshold}
+
+    def _first_new(self, dates, close):
+        """
+        Returns the position of the first bar to evaluate, or None if the
+        history no longer continues the processed bars and must be rescanned.
+        """
+        if self.through is None or dates[0] < self.first_date:
+            return None
+        position = dates.searchsorted(self.through)
+        if position == len(dates) or dates[position] != self.through:
+            return None
+        if abs(close[position] - self.through_close) > REVISION_TOLERANCE * abs(self.through_close):
+            return None
+        return position + 1
+
+    def _evaluate(self, dates, all_closes, all_volumes, first_new):
+        """
+        Finds the formations whose breakout day is at or after position `first_new`.
+        """
+        # Nur die Tage laden, die Cup, Henkel und Durchschnittsvolumen der neuen Ausbrüche brauchen
+        offset = max(first_new - max(self.cup_length + self.handle_length + 1, VOLUME_WINDOW - 1), 0)
+        close, volume, avg_volume = _prepare(all_closes[offset:], all_volumes[offset:], None)
+        candidates = _cup_candidates(close, volume, avg_volume, _ForwardWindows(close, volume), self.cup_length,
+                                     self.handle_length, None)
+        if candidates is None:
+            return []
+        mask = (_threshold_mask(candidates, self.cup_length, self.cup_depth_threshold, self.handle_depth_threshold)
+                & (candidates["breakout"] + offset >= first_new))
+
+        formations = []
+        for k in np.flatnonzero(mask):
+            start = candidates["start"][k] + offset
+            breakout = candidates["breakout"][k] + offset
+            uptrend_from = latest_uptrend_start(all_closes, start, self.uptrend_threshold)
+            if uptrend_from < 0:
+                continue
+            formations.append({"start_date": dates[start],
+                               "breakout_date": dates[breakout],
+                               "pivot": float(candidates["pivot"][k]),
+                               "uptrend_from": dates[uptrend_from],
+                               # Erster Tag des 50-Tage-Volumendurchschnitts am Ausbruch
+                               "volume_from": dates[breakout - VOLUME_WINDOW + 1]})
+        return formations
+
+    def update(self, data):
+        """
+        Advances the state to the end of `data`.
+
+        Args:
+            data (DataFrame): The current history, e.g. the last year of daily bars.
+
+        Returns:
+            list: The formations present in `data`, each a dict with start and
+                breakout date, pivot and the first days of its uptrend and of
+                the average volume of its breakout.
+        """
+        if data is None or len(data) < 2:
+            return []
+        dates = data.index
+        close = data['Close'].to_numpy(dtype=np.float64)
+        first_new = self._first_new(dates, close)
+        if first_new is None:
+            self.formations = []
+            self.rescans += 1
+            first_new = 0
+
+        found = self._evaluate(dates, close, data['Volume'].to_numpy(dtype=np.float64), first_new)
+        last_date = dates[-1]
+        # Formationen, deren Aufwärtstrend oder Volumendurchschnitt vor dem geladenen Zeitraum beginnt,
+        # zählen nicht mehr
+        self.formations = [formation for formation in self.formations + found
+                           if formation["breakout_date"] < last_date and formation["uptrend_from"] >= dates[0]
+                           and formation["volume_from"] >= dates[0]]
+        self.first_date = dates[0]
+        self.through = dates[-2]
+        self.through_close = float(close[-2])
+        return self.formations + [formation for formation in found if formation["breakout_date"] == last_date]
+
+
+def _state_path(symbol, state, directory):
+    digest = hashlib.sha1(repr(sorted(state.params.items())).encode()).hexdigest()[:12]
+    safe_symbol = str(symbol).strip().upper().replace("/", "_")
+    return os.path.join(directory, f"{safe_symbol}_cup_with_handle_{digest}.pkl")
+
+
+def load_pattern_state(symbol, directory=PATTERN_STATE_DIR, **params):
+    """
+    Reads the stored detector state of a symbol.
+
+    Args:
+        symbol (str): The stock symbol.
+        directory (str): Directory of the stored states.
+        **params: Parameters of CupWithHandleState, e.g. cup_length=42.
+
+    Returns:
+        CupWithHandleState: The stored state, or a new one if nothing is stored.
+    """
+    state = CupWithHandleState(**params)
+    path = _state_path(symbol, state, directory)
+    if not os.path.exists(path):
+        return state
+    try:
+        with open(path, "rb") as f:
+            stored = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError) as e:
+        print(f"Musterzustand für {symbol} nicht lesbar, wird neu berechnet: {e}")
+        return state
+    return stored if getattr(stored, "version", 1) == STATE_VERSION else state
+
+
+def save_pattern_state(symbol, state, directory=PATTERN_STATE_DIR):
+    """
+    Writes the detector state of a symbol (via a temporary file and a rename).
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = _state_path(symbol, state, directory)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def update_cup_with_handle(symbol, data, directory=PATTERN_STATE_DIR, **params):
+    """
+    Checks a symbol for "cup with handle" formations, evaluating only the
+    bars added since the last call.
+
+    Args:
+        symbol (str): The stock symbol.
+        data (DataFrame): The current history of the symbol.
+        directory (str): Directory of the stored states.
+        **params: Parameters of CupWithHandleState, e.g. cup_length=42.
+
+    Returns:
+        list: The formations present in `data` (see CupWithHandleState.update()).
+    """
+    state = load_pattern_state(symbol, directory, **params)
+    formations = state.update(data)
+    save_pattern_state(symbol, state, directory)
+    return formations
@@ -0,0 +1,520 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime
+
+import pandas as pd
+import yfinance as yf
+
+from rate_limiter import get_shared_session
+
+# Verzeichnis für den lokalen Kurs-Cache (eine Parquet-Datei pro Symbol)
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "price_cache")
+
+# Mindestzeitraum, der bei einem Cache-Miss geladen wird, damit kürzere Abfragen
+# anderer Skripte (1mo, 3mo, 21d, ...) aus derselben Datei bedient werden können
+MIN_FETCH_PERIOD = "1y"
+
+# Relative Abweichung eines bereits gespeicherten Schlusskurses, ab der die
+# Historie als angepasst (Split, Dividende) gilt und neu geladen wird
+REVISION_TOLERANCE = 1e-4
+
+# Parallele Downloads: Anzahl Threads und Symbole pro yf.download()-Aufruf
+MAX_WORKERS = 4
+DOWNLOAD_BATCH_SIZE = 50
+
+# Spalten von yfinance, die keine Auswertung braucht; sie werden beim Einlesen
+# verworfen (Splits und Dividenden werden nur im Delta-Download geprüft)
+UNUSED_COLUMNS = ("Dividends", "Stock Splits", "Capital Gains")
+
+# Spaltennamen der Symbole in den Symbollisten (stocklist *.csv, russell_2000_components.csv)
+SYMBOL_COLUMNS = ("Symbol", "Ticker")
+
+_PERIOD_PATTERN = re.compile(r"^(\d+)(d|wk|mo|y)$")
+
+
+def _cache_path(symbol):
+    """
+    Returns the Parquet file path for a symbol.
+
+    Args:
+        symbol (str): The stock symbol.
+
+    Returns:
+        str: The path of the cache file.
+    """
+    safe_symbol = str(symbol).strip().upper().replace("/", "_")
+    return os.path.join(CACHE_DIR, f"{safe_symbol}.parquet")
+
+
+def _period_start(period, today=None):
+    """
+    Converts a yfinance period string into the first calendar day it covers.
+
+    Args:
+        period (str): A yfinance period such as "1mo", "1y", "ytd" or "max".
+        today (date): The reference day, defaults to today.
+
+    Returns:
+        Timestamp: The start day, or None for "max" and day-count periods.
+    """
+    today = pd.Timestamp(today or date.today())
+    if period == "max":
+        return None
+    if period == "ytd":
+        return pd.Timestamp(today.year, 1, 1)
+    match = _PERIOD_PATTERN.match(period)
+    if not match:
+        raise ValueError(f"Unknown period: {period}")
+    count, unit = int(match.group(1)), match.group(2)
+    if unit == "d":
+        # Tagesangaben werden als Anzahl Handelstage interpretiert (siehe slice_period)
+        return None
+    if unit == "wk":
+        return today - pd.DateOffset(weeks=count)
+    if unit == "mo":
+        return today - pd.DateOffset(months=count)
+    return today - pd.DateOffset(years=count)
+
+
+def _localize(timestamp, index):
+    """
+    Aligns a naive timestamp with the timezone of a DatetimeIndex.
+    """
+    if timestamp is not None and getattr(index, "tz", None) is not None:
+        return timestamp.tz_localize(index.tz)
+    return timestamp
+
+
+def slice_period(data, period, today=None):
+    """
+    Cuts a cached history down to the requested period.
+
+    Args:
+        data (DataFrame): The cached history.
+        period (str): A yfinance period string.
+        today (date): The reference day of the period, defaults to today.
+
+    Returns:
+        DataFrame: The rows that fall into the period.
+    """
+    match = _PERIOD_PATTERN.match(period)
+    if match and match.group(2) == "d":
+        return data.iloc[-int(match.group(1)):]
+    start = _localize(_period_start(period, today), data.index)
+    if start is None:
+        return data
+    return data[data.index >= start]
+
+
+def _fetch_period(period):
+    """
+    Returns the period to download on a cache miss (at least MIN_FETCH_PERIOD).
+    """
+    if period == "max":
+        return period
+    requested_start = _period_start(period)
+    min_start = _period_start(MIN_FETCH_PERIOD)
+    if requested_start is not None and requested_start < min_start:
+        return period
+    return MIN_FETCH_PERIOD
+
+
+def drop_unused_columns(data):
+    """
+    Removes the yfinance columns that no analysis uses (see UNUSED_COLUMNS).
+
+    Args:
+        data (DataFrame): A yfinance history.
+
+    Returns:
+        DataFrame: The history with Open, High, Low, Close and Volume only.
+    """
+    unused = [column for column in UNUSED_COLUMNS if column in data.columns]
+    return data.drop(columns=unused) if unused else data
+
+
+def load_cached_history(symbol):
+    """
+    Reads the cached daily history of a symbol.
+
+    Args:
+        symbol (str): The stock symbol.
+
+    Returns:
+        DataFrame: The cached history, or None if nothing is stored.
+    """
+    path = _cache_path(symbol)
+    if not os.path.exists(path):
+        return None
+    try:
+        return drop_unused_columns(pd.read_parquet(path))
+    except Exception as e:
+        print(f"Cache-Datei für {symbol} nicht lesbar, wird neu geladen: {e}")
+        return None
+
+
+def save_cached_history(symbol, data, covered_from=None):
+    """
+    Writes the daily history of a symbol to the cache.
+
+    The file is written to a temporary name first and then renamed, so
+    concurrent readers never see a half-written file.
+
+    Args:
+        symbol (str): The stock symbol.
+        data (DataFrame): The history to store.
+        covered_from (Timestamp): First day the stored download was asked for.
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = _cache_path(symbol)
+    data = drop_unused_columns(data).copy()
+    if covered_from is not None:
+        data.attrs["covered_from"] = pd.Timestamp(covered_from).strftime("%Y-%m-%d")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    data.to_parquet(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def merge_history(cached, fresh):
+    """
+    Combines cached and freshly downloaded bars, preferring the fresh ones.
+
+    Args:
+        cached (DataFrame): The previously stored history (may be None).
+        fresh (DataFrame): The newly downloaded history.
+
+    Returns:
+        DataFrame: The merged history sorted by date.
+    """
+    fresh = drop_unused_columns(fresh)
+    if cached is None or cached.empty:
+        return fresh
+    if cached.index.tz is not None and fresh.index.tz is not None and fresh.index.tz != cached.index.tz:
+        fresh = fresh.tz_convert(cached.index.tz)
+    merged = pd.concat([cached, fresh])
+    merged = merged[~merged.index.duplicated(keep="last")]
+    return merged.sort_index()
+
+
+def _covered_from(data):
+    """
+    Returns the first day a cached history is known to cover.
+    """
+    covered_from = data.attrs.get("covered_from")
+    if covered_from:
+        return pd.Timestamp(covered_from)
+    return pd.Timestamp(data.index[0].date())
+
+
+def _is_fresh(symbol):
+    """
+    Checks whether the cache file of a symbol was written today.
+    """
+    path = _cache_path(symbol)
+    return datetime.fromtimestamp(os.path.getmtime(path)).date() == date.today()
+
+
+def _covers(data, period):
+    """
+    Checks whether a cached history reaches back far enough for a period.
+    """
+    if period == "max":
+        return False
+    requested_start = _period_start(period)
+    return requested_start is None or _covered_from(data) <= requested_start
+
+
+def _history_revised(cached, delta):
+    """
+    Checks whether a delta download contradicts the stored bars.
+
+    yfinance returns split- and dividend-adjusted prices, so a corporate action
+    changes every earlier bar. The delta overlaps the cache by one completed
+    bar; if that bar moved or a new split/dividend shows up, the stored history
+    is stale and has to be reloaded completely.
+
+    Args:
+        cached (DataFrame): The stored history.
+        delta (DataFrame): The newly downloaded bars.
+
+    Returns:
+        bool: True if the cached history must be reloaded.
+    """
+    check_date = cached.index[-2] if len(cached) > 1 else cached.index[-1]
+    if check_date not in delta.index:
+        return True
+    old_close = cached.at[check_date, "Close"]
+    new_close = delta.at[check_date, "Close"]
+    if abs(new_close - old_close) > REVISION_TOLERANCE * abs(old_close):
+        return True
+    new_bars = delta[delta.index > cached.index[-1]]
+    for column in ("Dividends", "Stock Splits"):
+        if column in new_bars.columns and (new_bars[column] != 0).any():
+            return True
+    return False
+
+
+def refresh_history(symbol, cached=None):
+    """
+    Brings the cached history of a symbol up to date by downloading only the
+    bars after the last stored one.
+
+    The download starts at the second-to-last stored bar so that a partial
+    intraday bar is replaced and the overlap can be checked for revisions.
+    When the history was revised (split, dividend) the full covered range is
+    downloaded again.
+
+    Args:
+        symbol (str): The stock symbol.
+        cached (DataFrame): The stored history, read from disk if omitted.
+
+    Returns:
+        DataFrame: The updated history.
+    """
+    if cached is None:
+        cached = load_cached_history(symbol)
+    if cached is None or cached.empty:
+        return get_history(symbol, period=MIN_FETCH_PERIOD)
+
+    covered_from = _covered_from(cached)
+    delta_start = cached.index[-2] if len(cached) > 1 else cached.index[-1]
+    delta = yf.Ticker(symbol, session=get_shared_session()).history(start=delta_start.strftime("%Y-%m-%d"))
+    if delta.empty:
+        # Keine neuen Kurse (Wochenende, Feiertag) - Cache nur als aktuell markieren
+        os.utime(_cache_path(symbol))
+        return cached
+
+    if _history_revised(cached, delta):
+        print(f"Kurshistorie von {symbol} wurde angepasst, lade vollständig neu.")
+        data = yf.Ticker(symbol, session=get_shared_session()).history(start=covered_from.strftime("%Y-%m-%d"))
+        if data.empty:
+            return cached
+        data = drop_unused_columns(data)
+    else:
+        data = merge_history(cached, delta)
+    save_cached_history(symbol, data, covered_from)
+    return data
+
+
+def refresh_histories(symbols, max_workers=MAX_WORKERS):
+    """
+    Runs the delta refresh for a list of symbols on a bounded thread pool.
+
+    Args:
+        symbols (list): A list of stock symbols.
+        max_workers (int): Number of concurrent download threads.
+
+    Returns:
+        dict: The updated history per symbol (symbols without data are skipped).
+    """
+    histories = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(refresh_history, symbol): symbol for symbol in _clean_symbols(symbols)}
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                data = future.result()
+            except Exception as e:
+                print(f"Fehler beim Aktualisieren von {symbol}: {e}")
+                continue
+            if data is not None and not data.empty:
+                histories[symbol] = data
+    return histories
+
+
+def get_history(symbol, period="1y"):
+    """
+    Retrieves the daily OHLCV history of a symbol, reading the local cache first.
+
+    A cache that covers the requested period but was written before today is
+    brought up to date with a delta download (see refresh_history). The full
+    period is only downloaded when the symbol is not cached yet or the cached
+    range is shorter than the requested one.
+
+    Args:
+        symbol (str): The stock symbol.
+        period (str): A yfinance period such as "1mo", "3mo", "1y" or "21d".
+
+    Returns:
+        DataFrame: A DataFrame with historical data.
+    """
+    cached = load_cached_history(symbol)
+    if cached is not None and not cached.empty and _covers(cached, period):
+        if not _is_fresh(symbol):
+            cached = refresh_history(symbol, cached)
+        return slice_period(cached, period)
+
+    fetch_period = _fetch_period(period)
+    fresh = yf.Ticker(symbol, session=get_shared_session()).history(period=fetch_period)
+    if fresh.empty:
+        return fresh if cached is None else slice_period(cached, period)
+    return _store_download(symbol, cached, fresh, fetch_period, period)
+
+
+def _store_download(symbol, cached, fresh, fetch_period, period):
+    """
+    Merges a full-period download into the cache and returns the requested slice.
+    """
+    data = merge_history(cached, fresh)
+    covered_from = _period_start(fetch_period)
+    if covered_from is None:
+        covered_from = data.index[0].date()
+    elif cached is not None and not cached.empty:
+        covered_from = min(covered_from, _covered_from(cached))
+    save_cached_history(symbol, data, covered_from)
+    return slice_period(data, period)
+
+
+def _split_download(data, symbols):
+    """
+    Splits a multi-ticker yf.download() result into one DataFrame per symbol.
+
+    Args:
+        data (DataFrame): The result of yf.download(..., group_by="ticker").
+        symbols (list): The symbols of the download.
+
+    Returns:
+        dict: A DataFrame per symbol that returned data.
+    """
+    frames = {}
+    if data is None or data.empty:
+        return frames
+    if not isinstance(data.columns, pd.MultiIndex):
+        # Ältere yfinance-Versionen liefern bei einem Symbol flache Spalten
+        frames[symbols[0]] = data.dropna(how="all")
+        return frames
+    available = set(data.columns.get_level_values(0))
+    for symbol in symbols:
+        if symbol not in available:
+            continue
+        frame = data[symbol].dropna(how="all")
+        if not frame.empty:
+            frame.columns.name = None
+            frames[symbol] = frame
+    return frames
+
+
+def _download_batch(symbols, period):
+    """
+    Downloads the daily history of several symbols with one yf.download() call.
+
+    Args:
+        symbols (list): The symbols of the batch.
+        period (str): A yfinance period string.
+
+    Returns:
+        dict: A DataFrame per symbol that returned data.
+    """
+    data = yf.download(symbols, period=period, interval="1d", group_by="ticker",
+                       auto_adjust=True, actions=True, ignore_tz=False,
+                       threads=False, progress=False, session=get_shared_session())
+    return _split_download(data, symbols)
+
+
+def read_symbol_list(filename):
+    """
+    Reads the symbols of a CSV symbol list.
+
+    Args:
+        filename (str): A CSV file with a Symbol or Ticker column.
+
+    Returns:
+        list: The symbols in file order.
+
+    Raises:
+        ValueError: If the file has neither a Symbol nor a Ticker column.
+    """
+    df = pd.read_csv(filename)
+    for column in SYMBOL_COLUMNS:
+        if column in df.columns:
+            return df[column].dropna().tolist()
+    raise ValueError(f"Die CSV-Datei enthält keine Spalte {' oder '.join(SYMBOL_COLUMNS)}.")
+
+
+def _clean_symbols(symbols):
+    """
+    Strips, de-duplicates and drops empty entries from a symbol list.
+    """
+    cleaned = []
+    seen = set()
+    for symbol in symbols:
+        if pd.isna(symbol):
+            continue
+        symbol = str(symbol).strip()
+        if symbol and symbol not in seen:
+            seen.add(symbol)
+            cleaned.append(symbol)
+    return cleaned
+
+
+def get_histories(symbols, period="1y", max_workers=MAX_WORKERS, batch_size=DOWNLOAD_BATCH_SIZE):
+    """
+    Retrieves the daily OHLCV history of a whole symbol list.
+
+    Symbols with a current cache file are read from disk. Stale cache files are
+    delta-refreshed and missing symbols are downloaded in batches with
+    yfinance's multi-ticker download. Both run on a bounded thread pool.
+
+    Args:
+        symbols (list): A list of stock symbols, e.g. from read_stock_symbols().
+        period (str): A yfinance period such as "3mo" or "1y".
+        max_workers (int): Number of concurrent download threads.
+        batch_size (int): Number of symbols per multi-ticker download.
+
+    Returns:
+        dict: A DataFrame with historical data per symbol (symbols without data are skipped).
+    """
+    symbols = _clean_symbols(symbols)
+    histories = {}
+    stale = []
+    missing = []
+    for symbol in symbols:
+        cached = load_cached_history(symbol)
+        if cached is not None and not cached.empty and _covers(cached, period):
+            if _is_fresh(symbol):
+                histories[symbol] = slice_period(cached, period)
+            else:
+                stale.append((symbol, cached))
+        else:
+            missing.append((symbol, cached))
+
+    fetch_period = _fetch_period(period)
+    batches = [missing[i:i + batch_size] for i in range(0, len(missing), batch_size)]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        refresh_futures = {executor.submit(refresh_history, symbol, cached): symbol for symbol, cached in stale}
+        batch_futures = {executor.submit(_download_batch, [symbol for symbol, _ in batch], fetch_period): batch
+                         for batch in batches}
+
+        for future in as_completed(refresh_futures):
+            symbol = refresh_futures[future]
+            try:
+                histories[symbol] = slice_period(future.result(), period)
+            except Exception as e:
+                print(f"Fehler beim Aktualisieren von {symbol}: {e}")
+
+        for future in as_completed(batch_futures):
+            batch = batch_futures[future]
+            try:
+                frames = future.result()
+            except Exception as e:
+                print(f"Fehler beim Abrufen der Daten für Batch: {[symbol for symbol, _ in batch]}: {e}")
+                continue
+            for symbol, cached in batch:
+                if symbol in frames:
+                    histories[symbol] = _store_download(symbol, cached, frames[symbol], fetch_period, period)
+                elif cached is not None and not cached.empty:
+                    histories[symbol] = slice_period(cached, period)
+                else:
+                    print(f"Keine Daten für {symbol} verfügbar")
+
+    return {symbol: histories[symbol] for symbol in symbols if symbol in histories}
+
+
+if __name__ == "__main__":
+    # Tägliche Aktualisierung aller Symbole einer CSV-Datei (z.B. russell_2000_components.csv)
+    csv_file_path = input("Bitte den Dateipfad der CSV-Datei eingeben: ")
+    symbols = read_symbol_list(csv_file_path)
+    histories = refresh_histories(symbols)
+    print(f"{len(histories)} von {len(symbols)} Symbolen aktualisiert.")
@@ -0,0 +1,219 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from indicators import rsi
+
+# Verzeichnis der Kursmatrix (eine .npy-Datei pro Feld, Symbole × Handelstage)
+MATRIX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "price_matrix")
+
+FIELDS = ("Close", "High", "Low", "Volume")
+
+# Rückblick in Handelstagen für 3, 6, 9 und 12 Monate
+LOOKBACKS = {"3mo": 63, "6mo": 126, "9mo": 189, "12mo": 252}
+
+# Gewichtung der Zeiträume wie in calc relative strength.py
+RS_WEIGHTS = {"3mo": 0.4, "6mo": 0.2, "9mo": 0.2, "12mo": 0.2}
+
+
+def rank_ratings(values):
+    """
+    Converts scores into 1-99 ratings: the best score gets 99, ties share the
+    best rank of their group.
+
+    Used for the relative strength rating of calc relative strength.py and
+    PriceMatrix.relative_strength_ratings(), so both rate the same ranks alike.
+
+    Args:
+        values (Series): The score per symbol, e.g. the weighted price change.
+
+    Returns:
+        Series: The rating as Int64, missing where the score is NaN.
+    """
+    valid = values.dropna()
+    ranks = valid.rank(ascending=False, method='min')
+    ratings = ((len(valid) - ranks) / len(valid) * 99).astype(int) + 1
+    return ratings.reindex(values.index).astype("Int64")
+
+
+def _to_days(index):
+    """
+    Converts a (possibly tz-aware) DatetimeIndex into datetime64[D] values.
+    """
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.normalize().values.astype("datetime64[D]")
+
+
+def build_price_matrix(histories, path=MATRIX_DIR, dtype=np.float32):
+    """
+    Writes the daily bars of many symbols into memory-mapped arrays.
+
+    All symbols are aligned on the union of their trading days; days without
+    a bar are NaN. Each field is written row by row through a memmap, so the
+    full matrix never has to fit into RAM. Prices are stored as `dtype`,
+    volumes always as float64, which holds every share count exactly. The
+    timezone and resolution of each symbol's dates are kept for frame().
+
+    Args:
+        histories (dict): A DataFrame with historical data per symbol,
+            e.g. from price_cache.get_histories().
+        path (str): The target directory.
+        dtype: The price type; float64 keeps prices identical to the histories.
+
+    Returns:
+        PriceMatrix: The opened matrix.
+    """
+    histories = {symbol: data for symbol, data in histories.items() if data is not None and not data.empty}
+    symbols = list(histories)
+    day_values = [_to_days(data.index) for data in histories.values()]
+    dates = np.unique(np.concatenate(day_values)) if day_values else np.array([], dtype="datetime64[D]")
+
+    os.makedirs(path, exist_ok=True)
+    arrays = {
+        field: np.lib.format.open_memmap(os.path.join(path, f"{field}.npy"), mode="w+",
+                                         dtype=np.float64 if field == "Volume" else dtype,
+                                         shape=(len(symbols), len(dates)))
+        for field in FIELDS
+    }
+    for i, (data, days) in enumerate(zip(histories.values(), day_values)):
+        positions = np.searchsorted(dates, days)
+        for field, array in arrays.items():
+            row = np.full(len(dates), np.nan, dtype=array.dtype)
+            row[positions] = data[field].to_numpy(dtype=array.dtype)
+            array[i] = row
+    for array in arrays.values():
+        array.flush()
+    del arrays
+
+    np.save(os.path.join(path, "dates.npy"), dates)
+    with open(os.path.join(path, "symbols.json"), "w") as f:
+        json.dump(symbols, f)
+    index_info = {symbol: {"tz": None if data.index.tz is None else str(data.index.tz),
+                           "unit": getattr(data.index, "unit", "ns")}
+                  for symbol, data in histories.items()}
+    with open(os.path.join(path, "index.json"), "w") as f:
+        json.dump(index_info, f)
+    return PriceMatrix(path)
+
+
+class PriceMatrix:
+    """
+    Symbols × trading days matrix of closes, highs, lows and volumes.
+
+    The arrays are opened memory-mapped and read-only, so opening is instant
+    and only the slices that are actually used are loaded from disk.
+    """
+
+    def __init__(self, path=MATRIX_DIR):
+        self.path = path
+        with open(os.path.join(path, "symbols.json")) as f:
+            self.symbols = json.load(f)
+        self.dates = np.load(os.path.join(path, "dates.npy"))
+        self.arrays = {field: np.load(os.path.join(path, f"{field}.npy"), mmap_mode="r") for field in FIELDS}
+        # Zeitzone und Auflösung der Datumsindizes (ältere Matrizen: tz-naive Tage)
+        index_path = os.path.join(path, "index.json")
+        self.index_info = {}
+        if os.path.exists(index_path):
+            with open(index_path) as f:
+                self.index_info = json.load(f)
+        self.symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    def __getitem__(self, field):
+        return self.arrays[field]
+
+    def frame(self, symbol):
+        """
+        Returns the bars of one symbol as a DataFrame.
+
+        Args:
+            symbol (str): The stock symbol.
+
+        Returns:
+            DataFrame: Close, High, Low and Volume indexed by date (in the
+                timezone and resolution of the symbol's original index).
+        """
+        i = self.symbol_index[symbol]
+        info = self.index_info.get(symbol, {})
+        index = pd.DatetimeIndex(self.dates.astype(f"datetime64[{info.get('unit', 'ns')}]"), name="Date")
+        if info.get("tz") is not None:
+            index = index.tz_localize(info["tz"])
+        data = pd.DataFrame({field: np.asarray(array[i]) for field, array in self.arrays.items()}, index=index)
+        return data.dropna(how="all")
+
+    def returns(self, lookback, field="Close"):
+        """
+        Computes the return over `lookback` trading days for all symbols at once.
+
+        Args:
+            lookback (int): The number of trading days.
+            field (str): The price field.
+
+        Returns:
+            ndarray: One return per symbol (NaN if a price is missing).
+        """
+        prices = self.arrays[field]
+        if lookback >= prices.shape[1]:
+            return np.full(prices.shape[0], np.nan, dtype=np.float32)
+        return prices[:, -1] / prices[:, -1 - lookback] - 1
+
+    def lookback_table(self, lookbacks=LOOKBACKS):
+        """
+        Builds the price/change table that calc relative strength.py reads.
+
+        Args:
+            lookbacks (dict): Trading days per period label.
+
+        Returns:
+            DataFrame: Symbol, last price, price <period> and change <period> columns.
+        """
+        close = self.arrays["Close"]
+        table = {"Symbol": self.symbols, "last price": np.asarray(close[:, -1])}
+        for label, lookback in lookbacks.items():
+            if lookback >= close.shape[1]:
+                table[f"price {label}"] = np.full(close.shape[0], np.nan, dtype=np.float32)
+            else:
+                table[f"price {label}"] = np.asarray(close[:, -1 - lookback])
+        for label, lookback in lookbacks.items():
+            table[f"change {label}"] = (table["last price"] / table[f"price {label}"] - 1) * 100
+        return pd.DataFrame(table)
+
+    def rsi(self, period=14):
+        """
+        Computes the current Wilder RSI of all symbols at once.
+
+        Args:
+            period (int): The RSI period.
+
+        Returns:
+            Series: The RSI of the last trading day per symbol.
+        """
+        values = rsi(self.arrays["Close"].T, period)
+        return pd.Series(values[-1] if len(values) else np.nan, index=self.symbols)
+
+    def relative_strength_ratings(self, lookbacks=LOOKBACKS, weights=RS_WEIGHTS):
+        """
+        Ranks all symbols by their weighted 3/6/9/12-month return.
+
+        Args:
+            lookbacks (dict): Trading days per period label.
+            weights (dict): Weight per period label.
+
+        Returns:
+            Series: The rating (1-99, see rank_ratings()) per symbol, missing where a price is missing.
+        """
+        weighted = sum(weights[label] * self.returns(lookbacks[label]) for label in weights)
+        return rank_ratings(pd.Series(weighted, index=self.symbols))
+
+
+if __name__ == "__main__":
+    from price_cache import get_histories, read_symbol_list
+
+    # Aufbau der Matrix für alle Symbole einer CSV-Datei aus dem lokalen Kurs-Cache
+    csv_file_path = input("Bitte den Dateipfad der CSV-Datei eingeben: ")
+    symbols = read_symbol_list(csv_file_path)
+    matrix = build_price_matrix(get_histories(symbols, period="2y"))
+    print(f"Kursmatrix mit {len(matrix.symbols)} Symbolen und {len(matrix.dates)} Handelstagen in {matrix.path} gespeichert.")
@@ -0,0 +1,145 @@
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+from price_cache import drop_unused_columns
+
+PRICE_FIELDS = ("Open", "High", "Low", "Close")
+
+# Größtes Volumen, das als uint32 gespeichert werden kann (Tage darüber werden gekappt)
+MAX_VOLUME = np.iinfo(np.uint32).max
+
+
+def day_numbers(index):
+    """
+    Converts a (possibly tz-aware) DatetimeIndex into int32 days since 1970-01-01.
+
+    Args:
+        index (DatetimeIndex): The bar dates.
+
+    Returns:
+        ndarray: The day numbers as int32.
+    """
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.normalize().values.astype("datetime64[D]").astype(np.int32)
+
+
+def compact_volume(volume):
+    """
+    Converts volumes to uint32 (missing values become 0, huge values are capped).
+    """
+    volume = np.nan_to_num(np.asarray(volume, dtype=np.float64), nan=0.0)
+    return np.clip(np.rint(volume), 0, MAX_VOLUME).astype(np.uint32)
+
+
+def compact_history(data):
+    """
+    Converts one yfinance history into its compact form.
+
+    Unused columns are dropped, prices become float32, the volume uint32
+    and the index a tz-naive date index.
+
+    Args:
+        data (DataFrame): A DataFrame with historical data.
+
+    Returns:
+        DataFrame: The compact history.
+    """
+    data = drop_unused_columns(data)
+    compact = pd.DataFrame({field: data[field].to_numpy(dtype=np.float32)
+                            for field in PRICE_FIELDS if field in data.columns},
+                           index=pd.DatetimeIndex(day_numbers(data.index).astype("datetime64[D]"), name="Date"))
+    if "Volume" in data.columns:
+        compact["Volume"] = compact_volume(data["Volume"])
+    return compact
+
+
+class PricePanel(Mapping):
+    """
+    Compact bars × symbols panel of many daily histories.
+
+    Prices are stored as float32 and volumes as uint32 arrays with one row per
+    trading day of a shared int32 day-number index; days on which a symbol has
+    no bar are NaN (volume 0). That needs roughly a quarter of the memory of
+    the per-symbol yfinance DataFrames.
+
+    The panel behaves like the dict of DataFrames returned by
+    MarketDataProvider.histories(), so it can be passed to any function that
+    takes `histories`; the vectorized functions in indicators.py read its
+    arrays directly.
+    """
+
+    def __init__(self, symbols, days, arrays):
+        self.symbols = list(symbols)
+        self.days = np.asarray(days, dtype=np.int32)
+        self.arrays = arrays
+        self.symbol_index = {symbol: j for j, symbol in enumerate(self.symbols)}
+
+    @classmethod
+    def from_histories(cls, histories):
+        """
+        Builds a panel from a DataFrame per symbol.
+
+        Args:
+            histories (dict): A DataFrame with historical data per symbol.
+
+        Returns:
+            PricePanel: The compact panel.
+        """
+        histories = {symbol: data for symbol, data in histories.items() if data is not None and not data.empty}
+        day_values = [day_numbers(data.index) for data in histories.values()]
+        days = np.unique(np.concatenate(day_values)) if day_values else np.array([], dtype=np.int32)
+        fields = [field for field in PRICE_FIELDS if all(field in data.columns for data in histories.values())]
+
+        arrays = {field: np.full((len(days), len(histories)), np.nan, dtype=np.float32) for field in fields}
+        arrays["Volume"] = np.zeros((len(days), len(histories)), dtype=np.uint32)
+        for j, (data, symbol_days) in enumerate(zip(histories.values(), day_values)):
+            rows = np.searchsorted(days, symbol_days)
+            for field in fields:
+                arrays[field][rows, j] = data[field].to_numpy(dtype=np.float32)
+            if "Volume" in data.columns:
+                arrays["Volume"][rows, j] = compact_volume(data["Volume"])
+        return cls(histories, days, arrays)
+
+    @property
+    def dates(self):
+        return pd.DatetimeIndex(self.days.astype("datetime64[D]"), name="Date")
+
+    @property
+    def nbytes(self):
+        return self.days.nbytes + sum(array.nbytes for array in self.arrays.values())
+
+    def field(self, name):
+        """
+        Returns one field as a (bar × symbol) array.
+        """
+        return self.arrays[name]
+
+    def __getitem__(self, symbol):
+        j = self.symbol_index[symbol]
+        data = pd.DataFrame({field: array[:, j] for field, array in self.arrays.items()}, index=self.dates)
+        # Nur die Tage, an denen das Symbol einen Kurs hat (wie in der ursprünglichen Historie)
+        valid = np.flatnonzero(~np.isnan(self.arrays["Close"][:, j])) if "Close" in self.arrays else []
+        return data.iloc[valid]
+
+    def __iter__(self):
+        return iter(self.symbols)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def with_fields(self, arrays):
+        """
+        Returns a panel with additional (bar × symbol) fields, e.g. indicators.
+
+        Args:
+            arrays (dict): Arrays of the panel's shape per field name.
+
+        Returns:
+            PricePanel: A new panel sharing the existing arrays.
+        """
+        added = {name: np.asarray(values, dtype=np.float32) for name, values in arrays.items()}
+        return PricePanel(self.symbols, self.days, {**self.arrays, **added})
@@ -0,0 +1,148 @@
+import random
+import threading
+import time
+
+try:
+    # Neuere yfinance-Versionen akzeptieren nur noch curl_cffi-Sessions
+    from curl_cffi.requests import Session
+    SESSION_KWARGS = {"impersonate": "chrome"}
+except ImportError:
+    from requests import Session
+    SESSION_KWARGS = {}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket with an adjustable refill rate.
+
+    Tokens are refilled continuously at `rate` per second up to `capacity`.
+    A thread that finds the bucket empty sleeps only as long as it needs for
+    the next token; other threads keep running.
+    """
+
+    def __init__(self, rate, capacity, min_rate=None, max_rate=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.min_rate = float(min_rate) if min_rate is not None else self.rate / 10
+        self.max_rate = float(max_rate) if max_rate is not None else self.rate * 2
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """
+        Blocks the calling thread until a token is available and takes it.
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                else:
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def slow_down(self, pause=0.0):
+        """
+        Halves the refill rate and optionally pauses all acquisitions.
+
+        Args:
+            pause (float): Seconds during which no token is handed out (e.g. Retry-After).
+        """
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0.0
+            self.paused_until = max(self.paused_until, now + pause)
+
+    def speed_up(self, step=0.05):
+        """
+        Raises the refill rate additively after a successful request.
+
+        Args:
+            step (float): Requests per second added to the rate.
+        """
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + step)
+
+
+def backoff_delay(attempt, base=1.0, cap=60.0):
+    """
+    Returns an exponential backoff delay with full jitter.
+
+    Args:
+        attempt (int): The number of the failed attempt, starting at 0.
+        base (float): The delay of the first retry in seconds.
+        cap (float): The maximum delay in seconds.
+
+    Returns:
+        float: The number of seconds to wait.
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class LimiterSession(Session):
+    """
+    HTTP session that paces requests with a shared token bucket.
+
+    The session can be shared by several worker threads. On HTTP 429 or an
+    empty response body the rate is halved (respecting Retry-After) and the
+    request is retried; every successful request raises the rate again, so
+    the session settles at the highest rate Yahoo tolerates.
+    """
+
+    def __init__(self, rate_limit=5, interval=5, max_rate=None, max_retries=3, **session_kwargs):
+        super().__init__(**{**SESSION_KWARGS, **session_kwargs})
+        rate = rate_limit / interval
+        self.bucket = TokenBucket(rate, capacity=rate_limit, max_rate=max_rate)
+        self.max_retries = max_retries
+
+    def _is_throttled(self, response):
+        return response.status_code == 429 or (response.status_code == 200 and not response.content)
+
+    def _retry_after(self, response):
+        try:
+            return float(response.headers.get("Retry-After", 0))
+        except (TypeError, ValueError):
+            return 0.0
+
+    def request(self, method, url, *args, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            response = super().request(method, url, *args, **kwargs)
+            if not self._is_throttled(response):
+                self.bucket.speed_up()
+                return response
+            pause = max(self._retry_after(response), backoff_delay(attempt))
+            self.bucket.slow_down(pause)
+            print(f"Rate-Limit erreicht (HTTP {response.status_code}), neue Rate: "
+                  f"{self.bucket.rate:.2f} Anfragen/s, Pause {pause:.1f} s")
+        return response
+
+
+_shared_session = None
+_shared_session_lock = threading.Lock()
+
+
+def get_shared_session():
+    """
+    Returns the process-wide LimiterSession for Yahoo Finance requests.
+
+    Returns:
+        LimiterSession: The shared session (created on first use).
+    """
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is None:
+            _shared_session = LimiterSession(rate_limit=5, interval=1, max_rate=10)
+        return _shared_session
@@ -0,0 +1,168 @@
+from collections import deque
+
+
+class StreamingIndicator:
+    """
+    Base class of indicators that are updated one bar at a time.
+
+    Each update() costs O(1) (amortized for the rolling extrema), so a live
+    loop only has to feed the newest bar instead of recomputing the whole
+    history. `value` is None until enough bars have been seen.
+    """
+
+    value = None
+
+    def update(self, *bar):
+        raise NotImplementedError
+
+    def seed(self, *columns):
+        """
+        Feeds a history into the indicator once, oldest bar first.
+
+        Args:
+            *columns: One iterable per update() argument, e.g. the closes.
+
+        Returns:
+            The indicator value after the last bar.
+        """
+        for bar in zip(*columns):
+            self.update(*bar)
+        return self.value
+
+    @property
+    def ready(self):
+        return self.value is not None
+
+
+class SMA(StreamingIndicator):
+    """
+    Simple moving average over the last `window` values.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.total = 0.0
+        self.value = None
+
+    def update(self, price):
+        self.values.append(price)
+        self.total += price
+        if len(self.values) > self.window:
+            self.total -= self.values.popleft()
+        if len(self.values) == self.window:
+            self.value = self.total / self.window
+        return self.value
+
+
+class EMA(StreamingIndicator):
+    """
+    Exponential moving average, seeded with the SMA of the first `window` values.
+
+    Args:
+        window (int): The period.
+        alpha (float): The smoothing factor, 2 / (window + 1) by default
+            (1 / window gives Wilder's smoothing).
+    """
+
+    def __init__(self, window, alpha=None):
+        self.window = window
+        self.alpha = alpha if alpha is not None else 2.0 / (window + 1)
+        self.seed_sma = SMA(window)
+        self.value = None
+
+    def update(self, price):
+        if self.value is None:
+            self.value = self.seed_sma.update(price)
+        else:
+            self.value += self.alpha * (price - self.value)
+        return self.value
+
+
+class ATR(StreamingIndicator):
+    """
+    Average True Range fed with high, low and close of each bar.
+
+    Args:
+        period (int): The ATR period.
+        method (str): "simple", "wilder" or "ema" like indicators.average_true_range().
+    """
+
+    def __init__(self, period=21, method="simple"):
+        if method == "simple":
+            self.average = SMA(period)
+        elif method == "wilder":
+            self.average = EMA(period, alpha=1.0 / period)
+        elif method == "ema":
+            self.average = EMA(period)
+        else:
+            raise ValueError(f"Unknown ATR method: {method}")
+        self.previous_close = None
+        self.value = None
+
+    def update(self, high, low, close):
+        if self.previous_close is None:
+            true_range = high - low
+        else:
+            true_range = max(high, self.previous_close) - min(low, self.previous_close)
+        self.previous_close = close
+        self.value = self.average.update(true_range)
+        return self.value
+
+
+class RollingMax(StreamingIndicator):
+    """
+    Maximum of the last `window` values (monotonic deque, amortized O(1)).
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.count = 0
+        # (Position, Wert) mit fallenden Werten; vorne steht das Maximum
+        self.candidates = deque()
+        self.value = None
+
+    def _dominates(self, new, old):
+        return new >= old
+
+    def update(self, price):
+        while self.candidates and self.candidates[0][0] <= self.count - self.window:
+            self.candidates.popleft()
+        while self.candidates and self._dominates(price, self.candidates[-1][1]):
+            self.candidates.pop()
+        self.candidates.append((self.count, price))
+        self.count += 1
+        if self.count >= self.window:
+            self.value = self.candidates[0][1]
+        return self.value
+
+
+class RollingMin(RollingMax):
+    """
+    Minimum of the last `window` values (monotonic deque, amortized O(1)).
+    """
+
+    def _dominates(self, new, old):
+        return new <= old
+
+
+class RSI(StreamingIndicator):
+    """
+    Wilder's RSI fed with one close per bar, like indicators.rsi().
+    """
+
+    def __init__(self, period=14):
+        self.average_gain = EMA(period, alpha=1.0 / period)
+        self.average_loss = EMA(period, alpha=1.0 / period)
+        self.previous_close = None
+        self.value = None
+
+    def update(self, close):
+        if self.previous_close is not None:
+            change = close - self.previous_close
+            gain = self.average_gain.update(max(change, 0.0))
+            loss = self.average_loss.update(max(-change, 0.0))
+            if loss is not None:
+                self.value = 100.0 if loss == 0 else 100 - 100 / (1 + gain / loss)
+        self.previous_close = close
+        return self.value
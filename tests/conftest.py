@@ -0,0 +1,35 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Die Module liegen auf oberster Ebene des Repositories
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def random_walk():
+    """
+    Factory for daily OHLCV histories following a geometric random walk.
+
+    Args of the returned function:
+        days (int): Number of business days.
+        rng (int | Generator): Seed or generator; pass one generator to draw several symbols in a row.
+        start (str): First day.
+        tz (str): Time zone of the index (None for naive dates).
+        start_price (float): Price level the walk starts from.
+        drift (float): Mean daily log return.
+        volatility (float): Standard deviation of the daily log return.
+        volume (tuple): Lower and upper bound of the daily volume.
+    """
+    def make(days, rng=0, start="2023-01-02", tz="America/New_York", start_price=100, drift=0.0005,
+             volatility=0.02, volume=(100_000, 10_000_000)):
+        rng = np.random.default_rng(rng)
+        close = start_price * np.exp(np.cumsum(rng.normal(drift, volatility, days)))
+        return pd.DataFrame({"Open": close, "High": close * 1.01, "Low": close * 0.99, "Close": close,
+                             "Volume": rng.integers(*volume, days)},
+                            index=pd.bdate_range(start, periods=days, tz=tz))
+
+    return make
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from chart_patterns import cup_with_handle_starts, scan_base_patterns
+
+
+def _vcp_history(lead):
+    """
+    Rise to 100, then pullbacks of 22%, 10% and 5% and a breakout, after
+    `lead` flat days.
+    """
+    legs = [(60, lead), (100, 10), (78, 6), (98, 6), (88, 5), (98, 5), (93, 4), (98, 4), (110, 8), (115, 40)]
+    close = [60.0]
+    for target, days in legs:
+        close += list(np.linspace(close[-1], target, days + 1)[1:])
+    dates = pd.bdate_range("2024-01-02", periods=len(close))
+    return pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close,
+                         "Volume": np.full(len(close), 1e6)}, index=dates)
+
+
+def test_vcp_needs_the_average_volume_of_its_last_contraction():
+    late = scan_base_patterns(_vcp_history(lead=60), patterns=["vcp"])
+    early = scan_base_patterns(_vcp_history(lead=3), patterns=["vcp"])
+
+    assert late["end"].tolist() == [96]
+    # Die letzte Kontraktion endet vor dem 50. Tag, ihr Volumen ist nicht prüfbar
+    assert early.empty
+
+
+def _baseline_starts(data, cup_length_min):
+    """
+    The quadratic loop of the original check_cup_with_handle(), returning
+    every start day instead of stopping at the first one.
+    """
+    cup_depth_threshold = 0.33
+    handle_depth_threshold = 0.12
+    handle_length_max = cup_length_min
+    uptrend_threshold = 0.30
+    starts = []
+    for i in range(len(data) - cup_length_min - handle_length_max):
+        pre_cup = data['Close'].iloc[:i]
+        if len(pre_cup) > 0 and (pre_cup.max() - pre_cup.min()) / pre_cup.min() >= uptrend_threshold:
+            cup = data['Close'].iloc[i:i + cup_length_min]
+            max_price = cup.max()
+            min_price = cup.min()
+            cup_depth = (max_price - min_price) / max_price
+            if cup_depth > cup_depth_threshold and len(cup) / cup_depth >= 1.5:
+                handle = data['Close'].iloc[i + cup_length_min:i + cup_length_min + handle_length_max]
+                handle_max_price = handle.max()
+                handle_min_price = handle.min()
+                handle_depth = (handle_max_price - handle_min_price) / handle_max_price
+                if handle_depth < handle_depth_threshold and handle_min_price > min_price + (max_price - min_price) / 3:
+                    if handle.iloc[0] > handle.iloc[1]:
+                        cup_volume = data['Volume'].iloc[i:i + cup_length_min]
+                        handle_volume = data['Volume'].iloc[i + cup_length_min:i + cup_length_min + handle_length_max]
+                        if cup_volume.max() > handle_volume.max():
+                            breakout = i + cup_length_min + handle_length_max
+                            breakout_volume = data['Volume'].iloc[breakout]
+                            avg_volume = data['Volume'].rolling(window=50).mean().iloc[breakout]
+                            if breakout_volume > avg_volume:
+                                handle_midpoint = (handle_max_price + handle_min_price) / 2
+                                cup_midpoint = (max_price + min_price) / 2
+                                if handle_midpoint > cup_midpoint:
+                                    starts.append(i)
+    return starts
+
+
+def _cup_history(cup_length, seed):
+    """
+    Uptrend, a rounded cup of 30-45% depth, a handle on lower volume and a
+    breakout on heavy volume, all with noise (some seeds miss the rules).
+    """
+    rng = np.random.default_rng(seed)
+    lead = int(rng.integers(40, 80))
+    uptrend = np.linspace(60, 100, lead)
+    cup = 100 * (1 - rng.uniform(0.30, 0.45) * np.sin(np.linspace(0, np.pi, cup_length)))
+    handle = np.r_[cup[-1] * 0.97, cup[-1] * (0.95 + 0.04 * rng.random(cup_length - 1))]
+    tail = handle[-1] * (1 + np.cumsum(rng.normal(0.002, 0.01, 30)))
+    close = np.r_[uptrend, cup, handle, tail]
+    close *= 1 + rng.normal(0, 0.004, len(close))
+    volume = rng.uniform(0.8e6, 1.2e6, len(close))
+    volume[lead:lead + cup_length] *= rng.uniform(1.0, 1.6, cup_length)
+    volume[lead + cup_length:lead + 2 * cup_length] *= 0.6
+    volume[lead + 2 * cup_length:lead + 2 * cup_length + 5] *= 2.5
+    return pd.DataFrame({"Close": close, "Volume": volume}, index=pd.bdate_range("2023-01-02", periods=len(close)))
+
+
+@pytest.mark.parametrize("cup_length", [30, 42])
+def test_cup_with_handle_starts_match_the_quadratic_scan(cup_length):
+    found = 0
+    for seed in range(12):
+        data = _cup_history(cup_length, seed)
+        expected = _baseline_starts(data, cup_length)
+        starts = cup_with_handle_starts(data['Close'].to_numpy(), data['Volume'].to_numpy(), cup_length=cup_length)
+
+        assert np.flatnonzero(starts).tolist() == expected
+        found += len(expected)
+    assert found > 0
@@ -0,0 +1,22 @@
+import pytest
+
+from data_providers import IBKRProvider, LocalProvider, MarketDataProvider, UnsupportedDataError
+
+
+def test_provider_without_options_and_earnings_cannot_be_created():
+    class HistoryOnly(MarketDataProvider):
+        def history(self, symbol, period="1y"):
+            return None
+
+    with pytest.raises(TypeError):
+        HistoryOnly()
+
+
+@pytest.mark.parametrize("provider", [IBKRProvider(), LocalProvider()])
+def test_unsupported_data_raises_documented_error(provider):
+    with pytest.raises(UnsupportedDataError):
+        provider.option_expirations("AAPL")
+    with pytest.raises(UnsupportedDataError):
+        provider.option_chain("AAPL", "2025-01-17")
+    with pytest.raises(UnsupportedDataError):
+        provider.earnings("AAPL")
@@ -0,0 +1,183 @@
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("ibapi")
+
+from ib_history import HistoricalDataError, PacingScheduler, closes_at_offsets, stock_contract, trim_bars
+
+
+def _daily_bars(days, end=date(2024, 6, 28)):
+    dates = [end - timedelta(days=i) for i in range(days * 2) if (end - timedelta(days=i)).weekday() < 5][:days]
+    return [SimpleNamespace(date=day.strftime("%Y%m%d"), close=100.0 + i) for i, day in enumerate(reversed(dates))]
+
+
+class StubClient:
+    """
+    Records the requests of a PacingScheduler; the test answers them by hand.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.cancelled = []
+        self.sent = threading.Condition()
+
+    def request_history(self, contract, endDateTime, durationStr, barSizeSetting, whatToShow, useRTH):
+        future = Future()
+        future.reqId = len(self.requests)
+        with self.sent:
+            self.requests.append((contract.symbol, durationStr, future))
+            self.sent.notify_all()
+        return future
+
+    def cancel(self, future):
+        self.cancelled.append(future.reqId)
+        future.set_exception(FutureTimeoutError(f"Anfrage {future.reqId} abgebrochen"))
+
+    def wait_for(self, count, timeout=2):
+        with self.sent:
+            assert self.sent.wait_for(lambda: len(self.requests) >= count, timeout=timeout)
+        return self.requests[count - 1][2]
+
+
+@pytest.fixture
+def client():
+    return StubClient()
+
+
+@pytest.fixture
+def make_scheduler(client):
+    schedulers = []
+
+    def make(**kwargs):
+        schedulers.append(PacingScheduler(client, **kwargs))
+        return schedulers[-1]
+
+    yield make
+    for scheduler in schedulers:
+        scheduler.stop()
+
+
+def test_identical_and_shorter_requests_share_one_call(client, make_scheduler):
+    scheduler = make_scheduler()
+    year = scheduler.submit(stock_contract("AAPL"), durationStr="1 Y")
+    same = scheduler.submit(stock_contract("AAPL"), durationStr="1 Y")
+    month = scheduler.submit(stock_contract("AAPL"), durationStr="20 D")
+
+    bars = _daily_bars(250)
+    client.wait_for(1).set_result(bars)
+
+    assert year.result(timeout=2) == bars
+    assert same.result(timeout=2) == bars
+    assert month.result(timeout=2) == bars[-20:]
+    assert len(client.requests) == 1
+
+
+def test_recent_result_is_trimmed_and_evicted(client, make_scheduler):
+    scheduler = make_scheduler(recent_ttl=0.2)
+    first = scheduler.submit(stock_contract("AAPL"), durationStr="1 Y")
+    bars = _daily_bars(250)
+    client.wait_for(1).set_result(bars)
+    first.result(timeout=2)
+
+    assert scheduler.submit(stock_contract("AAPL"), durationStr="5 D").result(timeout=2) == bars[-5:]
+    assert len(client.requests) == 1
+
+    time.sleep(0.6)
+    assert scheduler.recent == {}
+
+
+def test_longer_request_while_in_flight_takes_later_waiters(client, make_scheduler):
+    scheduler = make_scheduler()
+    short = scheduler.submit(stock_contract("AAPL"), durationStr="20 D")
+    client.wait_for(1)
+    year = scheduler.submit(stock_contract("AAPL"), durationStr="1 Y")
+    client.wait_for(2)
+    half_year = scheduler.submit(stock_contract("AAPL"), durationStr="60 D")
+
+    bars = _daily_bars(250)
+    client.requests[0][2].set_result(bars[-20:])
+    client.requests[1][2].set_result(bars)
+
+    assert short.result(timeout=2) == bars[-20:]
+    assert year.result(timeout=2) == bars
+    assert half_year.result(timeout=2) == bars[-60:]
+    assert [durationStr for _, durationStr, _ in client.requests] == ["20 D", "1 Y"]
+
+
+def test_pacing_violation_is_retried(client, make_scheduler):
+    scheduler = make_scheduler(identical_interval=0.05)
+    future = scheduler.submit(stock_contract("AAPL"), durationStr="1 Y")
+    client.wait_for(1).set_exception(HistoricalDataError(0, 162, "Historical data request pacing violation"))
+    bars = _daily_bars(250)
+    client.wait_for(2).set_result(bars)
+
+    assert future.result(timeout=2) == bars
+
+
+def test_unanswered_request_is_cancelled_after_timeout(client, make_scheduler):
+    scheduler = make_scheduler()
+    future = scheduler.submit(stock_contract("SLOW"), durationStr="1 Y", timeout=0.1)
+    client.wait_for(1)
+
+    with pytest.raises(FutureTimeoutError):
+        future.result(timeout=2)
+    assert client.cancelled == [0]
+
+
+def test_stop_fails_queued_requests(client, make_scheduler):
+    scheduler = make_scheduler(max_in_flight=1)
+    scheduler.submit(stock_contract("SLOW"), durationStr="1 Y")
+    client.wait_for(1)
+    queued = scheduler.submit(stock_contract("AAPL"), durationStr="1 Y")
+
+    scheduler.stop()
+
+    with pytest.raises(ConnectionError):
+        queued.result(timeout=2)
+    with pytest.raises(ConnectionError):
+        scheduler.submit(stock_contract("MSFT")).result(timeout=2)
+
+
+def _bar(day, close):
+    return SimpleNamespace(date=day.strftime("%Y%m%d"), close=close)
+
+
+def test_closes_snap_to_nearest_trading_day():
+    # Freitag 2024-06-14 und Montag 2024-06-17: Samstag gehört zum Freitag, Sonntag zum Montag
+    bars = [_bar(date(2024, 6, 14), 10.0), _bar(date(2024, 6, 17), 11.0), _bar(date(2024, 6, 28), 12.0)]
+
+    closes = closes_at_offsets(bars, [0, 13, 12, 11], as_of=date(2024, 6, 28))
+
+    assert closes == {0: 12.0, 13: 10.0, 12: 11.0, 11: 11.0}
+
+
+def test_closes_prefer_the_earlier_bar_on_a_tie():
+    bars = [_bar(date(2024, 6, 14), 10.0), _bar(date(2024, 6, 18), 11.0)]
+
+    # 2024-06-16 ist zwei Tage von beiden Kursen entfernt
+    assert closes_at_offsets(bars, [12], as_of=date(2024, 6, 28)) == {12: 10.0}
+
+
+def test_closes_outside_the_tolerance_are_none():
+    bars = [_bar(date(2024, 1, 2), 10.0), _bar(date(2024, 6, 28), 12.0)]
+
+    closes = closes_at_offsets(bars, [0, 90, 360], as_of=date(2024, 6, 28), tolerance_days=7)
+
+    assert closes == {0: 12.0, 90: None, 360: None}
+    assert closes_at_offsets([], [0], as_of=date(2024, 6, 28)) == {0: None}
+
+
+def test_trim_bars_counts_trading_days_for_d_and_calendar_days_otherwise():
+    bars = _daily_bars(250)
+
+    assert trim_bars(bars, "20 D") == bars[-20:]
+    week = trim_bars(bars, "1 W", endDateTime="20240628 23:59:59")
+    assert [bar.date for bar in week] == ["20240624", "20240625", "20240626", "20240627", "20240628"]
+    month = trim_bars(bars, "1 M", endDateTime="20240628 23:59:59")
+    assert month[0].date == "20240530" and month[-1].date == "20240628"
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from indicators import calculate_indicators_batch, current_atr, latest_atr, stack_right_aligned
+from price_panel import PricePanel
+
+
+@pytest.fixture
+def histories(random_walk):
+    rng = np.random.default_rng(1)
+    histories = {symbol: random_walk(320, rng, tz=None) for symbol in ("FULL", "GAPPED", "SHORT")}
+    # Einzelne fehlende Handelstage (z.B. Handelsaussetzung) und eine kürzere Historie
+    histories["GAPPED"] = histories["GAPPED"].drop(histories["GAPPED"].index[[40, 150, 300]])
+    histories["SHORT"] = histories["SHORT"].iloc[100:]
+    return histories
+
+
+def test_panel_stacks_like_dict_with_gaps(histories):
+    panel = PricePanel.from_histories(histories)
+
+    np.testing.assert_allclose(stack_right_aligned(panel, 'Close'), stack_right_aligned(histories, 'Close'),
+                               rtol=1e-6)
+
+
+def test_panel_indicators_match_dict_with_gaps(histories):
+    from_dict = calculate_indicators_batch(histories)
+    from_panel = calculate_indicators_batch(PricePanel.from_histories(histories))
+
+    for symbol, expected in from_dict.items():
+        actual = from_panel[symbol]
+        assert len(actual) == len(expected)
+        for column in ("SMA200", "HH21", "LL21", "ATR21", "BB_upper"):
+            np.testing.assert_allclose(actual[column].to_numpy(dtype=np.float64), expected[column].to_numpy(),
+                                       rtol=1e-5, err_msg=f"{symbol} {column}")
+    assert not np.isnan(from_panel["GAPPED"]["SMA200"].iloc[-1])
+
+
+def test_latest_atr_panel_matches_dict(histories):
+    expected = latest_atr(histories)
+    actual = latest_atr(PricePanel.from_histories(histories))
+    for symbol in histories:
+        np.testing.assert_allclose(actual[symbol], expected[symbol], rtol=1e-5)
+
+
+def test_current_atr_matches_loop_and_short_histories():
+    rng = np.random.default_rng(3)
+    close = list(100 + np.cumsum(rng.normal(0, 1, 30)))
+    high = [price + rng.uniform(0, 2) for price in close]
+    low = [price - rng.uniform(0, 2) for price in close]
+    # Schleife der früheren calculate_atr()-Kopien in den Skripten
+    tr_values = [max(h - l, abs(h - previous_close), abs(l - previous_close))
+                 for h, l, previous_close in zip(high[1:], low[1:], close[:-1])]
+    tr_values.insert(0, high[0] - low[0])
+
+    assert np.isclose(current_atr(high, low, close, period=21), np.mean(tr_values[-21:]))
+    assert np.isclose(current_atr(high[:10], low[:10], close[:10], period=21), np.mean(tr_values[:10]))
@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+
+from chart_patterns import scan_base_patterns, scan_cup_with_handle
+from parallel_scan import parallel_scan
+
+
+@pytest.fixture
+def histories(random_walk):
+    # Volumen über 2**24, das float32 nicht mehr exakt darstellt
+    return {f"S{seed}": random_walk(500, seed, start="2022-01-03", drift=0.001, volatility=0.03,
+                                    volume=(10_000_000, 60_000_000)) for seed in range(8)}
+
+
+def _serial_scan(histories, scan, **grid):
+    matches = []
+    for symbol, data in histories.items():
+        found = scan(data, **grid)
+        if not found.empty:
+            found.insert(0, "Symbol", symbol)
+            matches.append(found)
+    return pd.concat(matches, ignore_index=True)
+
+
+def _sorted(results):
+    return results.sort_values(["Symbol", "start"], kind="stable").reset_index(drop=True)
+
+
+def test_parallel_base_pattern_scan_matches_serial_scan(histories):
+    expected = _serial_scan(histories, scan_base_patterns)
+    actual = parallel_scan(histories, max_workers=2, scanner="base_patterns")
+
+    pd.testing.assert_frame_equal(_sorted(actual), _sorted(expected))
+
+
+def test_parallel_cup_scan_matches_serial_scan(histories):
+    grid = {"cup_lengths": (20, 30), "cup_depth_thresholds": (0.2, 0.33)}
+    expected = _serial_scan(histories, scan_cup_with_handle, **grid)
+    actual = parallel_scan(histories, max_workers=2, **grid)
+
+    assert len(expected) > 0
+    pd.testing.assert_frame_equal(_sorted(actual), _sorted(expected))
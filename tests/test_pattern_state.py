@@ -0,0 +1,60 @@
+import pytest
+
+from chart_patterns import cup_with_handle_starts
+from pattern_state import CupWithHandleState, update_cup_with_handle
+
+WINDOW = 252
+
+
+@pytest.fixture
+def history(random_walk):
+    def make(seed):
+        return random_walk(700, seed, start="2020-01-01", drift=0.001, volatility=0.03, volume=(100_000, 1_000_000))
+
+    return make
+
+
+# Flachere Cups, damit jede Länge genügend Formationen findet; bei 10/10 liegt
+# der Ausbruch von Formationen am Fensteranfang innerhalb des 50-Tage-Volumenfensters
+@pytest.mark.parametrize("cup_length, handle_length, cup_depth_threshold",
+                         [(30, None, 0.2), (20, 15, 0.15), (10, 10, 0.1)])
+def test_sliding_window_replay_matches_full_scan(history, cup_length, handle_length, cup_depth_threshold):
+    mismatches = []
+    matches = 0
+    for seed in range(6):
+        data = history(seed)
+        state = CupWithHandleState(cup_length, handle_length, cup_depth_threshold)
+        for end in range(WINDOW, len(data) + 1):
+            window = data.iloc[end - WINDOW:end]
+            found = sorted(formation["start_date"] for formation in state.update(window))
+            starts = cup_with_handle_starts(window['Close'].to_numpy(), window['Volume'].to_numpy(),
+                                            cup_length, handle_length, cup_depth_threshold)
+            matches += starts.sum()
+            if found != list(window.index[starts]):
+                mismatches.append((seed, window.index[-1]))
+        # Nur der erste Aufruf scannt die ganze Historie
+        assert state.rescans == 1
+    assert matches > 0
+    assert mismatches == []
+
+
+def test_revised_history_triggers_rescan(history):
+    data = history(1).iloc[:WINDOW]
+    state = CupWithHandleState(20, 15)
+    state.update(data)
+    adjusted = data.copy()
+    adjusted["Close"] /= 2  # Split 2:1
+
+    state.update(adjusted)
+
+    assert state.rescans == 2
+
+
+def test_state_is_persisted_between_calls(history, tmp_path):
+    data = history(2)
+    for end in (WINDOW, WINDOW + 1, WINDOW + 2):
+        formations = update_cup_with_handle("TEST", data.iloc[end - WINDOW:end], str(tmp_path), cup_length=20)
+        starts = cup_with_handle_starts(data['Close'].to_numpy()[end - WINDOW:end],
+                                        data['Volume'].to_numpy()[end - WINDOW:end], 20)
+        assert sorted(formation["start_date"] for formation in formations) == list(data.index[end - WINDOW:end][starts])
+    assert len(list(tmp_path.iterdir())) == 1
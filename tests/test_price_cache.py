@@ -0,0 +1,19 @@
+import pytest
+
+from price_cache import read_symbol_list
+
+
+@pytest.mark.parametrize("header", ["Symbol,Name", "Ticker,Name"])
+def test_symbol_list_accepts_symbol_or_ticker_column(header, tmp_path):
+    path = tmp_path / "symbols.csv"
+    path.write_text(f"{header}\nAAPL,Apple Inc\nMSFT,Microsoft Corp\n")
+
+    assert read_symbol_list(str(path)) == ["AAPL", "MSFT"]
+
+
+def test_symbol_list_without_symbol_column_raises(tmp_path):
+    path = tmp_path / "symbols.csv"
+    path.write_text("Name\nApple Inc\n")
+
+    with pytest.raises(ValueError):
+        read_symbol_list(str(path))
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from price_matrix import RS_WEIGHTS, build_price_matrix, rank_ratings
+
+
+@pytest.fixture
+def histories(random_walk):
+    rng = np.random.default_rng(0)
+    return {f"S{i}": random_walk(300, rng, start_price=50) for i in range(40)}
+
+
+def test_rank_ratings_matches_script_formula_with_ties():
+    values = pd.Series([5.0, 3.0, 3.0, np.nan, -1.0, 8.0], index=list("ABCDEF"))
+    valid = values.dropna()
+    expected = valid.rank(ascending=False, method='min').apply(lambda x: int((len(valid) - x) / len(valid) * 99) + 1)
+
+    ratings = rank_ratings(values)
+
+    assert ratings.loc[valid.index].tolist() == expected.tolist()
+    assert ratings.isna().tolist() == [False, False, False, True, False, False]
+
+
+def test_matrix_ratings_agree_with_lookback_table(histories, tmp_path):
+    matrix = build_price_matrix(histories, str(tmp_path / "matrix"))
+
+    # Gewichtete Preisänderung wie in calc relative strength.py
+    table = matrix.lookback_table().set_index("Symbol")
+    weighted = sum(weight * table[f"change {label}"] for label, weight in RS_WEIGHTS.items())
+
+    pd.testing.assert_series_equal(matrix.relative_strength_ratings(), rank_ratings(weighted), check_names=False)
@@ -0,0 +1,56 @@
+import pandas as pd
+
+# Zeitrahmen und ihre pandas-Periode (Wochen enden am Freitag)
+FREQUENCIES = {
+    "weekly": "W-FRI",
+    "monthly": "M",
+    "quarterly": "Q",
+}
+
+
+def resample_bars(data, timeframe="weekly"):
+    """
+    Builds weekly, monthly or quarterly OHLCV bars from daily bars.
+
+    The bars are grouped by calendar week (Monday to Friday), month or
+    quarter. Each bar is labelled with its last actual trading day, so a
+    week ending on a holiday Friday is dated Thursday and the current,
+    still open period ends at the latest daily bar.
+
+    Args:
+        data (DataFrame): A DataFrame with daily Open, High, Low, Close and Volume.
+        timeframe (str): "weekly", "monthly" or "quarterly".
+
+    Returns:
+        DataFrame: One bar per period (Open first, High max, Low min, Close last, Volume sum).
+    """
+    if timeframe not in FREQUENCIES:
+        raise ValueError(f"Unknown timeframe: {timeframe}")
+    if data is None or data.empty:
+        return pd.DataFrame(columns=['Open', 'High', 'Low', 'Close', 'Volume'])
+
+    dates = data.index.tz_localize(None) if data.index.tz is not None else data.index
+    periods = dates.to_period(FREQUENCIES[timeframe])
+    aggregation = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+    aggregation = {column: how for column, how in aggregation.items() if column in data.columns}
+
+    bars = data.groupby(periods, sort=True).agg(aggregation)
+    # Datum des letzten Handelstags jeder Periode als Index
+    last_days = data.index.to_series().groupby(periods, sort=True).last()
+    bars.index = pd.DatetimeIndex(last_days, name=data.index.name or "Date")
+    return bars
+
+
+def resample_histories(histories, timeframe="weekly"):
+    """
+    Resamples the daily bars of many symbols.
+
+    Args:
+        histories (dict): A DataFrame with daily data per symbol,
+            e.g. from MarketDataProvider.histories().
+        timeframe (str): "weekly", "monthly" or "quarterly".
+
+    Returns:
+        dict: A DataFrame with the resampled bars per symbol.
+    """
+    return {symbol: resample_bars(data, timeframe) for symbol, data in histories.items()}
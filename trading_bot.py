@@ -1,36 +1,72 @@
 import yfinance as yf
 from datetime import datetime, timedelta
-import pandas_ta as ta
 import time
+from rate_limiter import get_shared_session
+from streaming import SMA
 
-ticker = "AMZN"
-asset = yf.Ticker(ticker)
+tickers = ["AMZN"]
 interval_fast = 10
 interval_slow = 30
-currently_holding = False
 tradelog = []
 
+
+class CrossoverBot:
+    """
+    SMA crossover state of one ticker.
+
+    The SMAs are seeded once from two days of 1-minute bars; afterwards every
+    tick only downloads the bars since the last processed one and feeds them
+    into the streaming SMAs.
+    """
+
+    def __init__(self, ticker):
+        self.ticker = ticker
+        self.asset = yf.Ticker(ticker, session=get_shared_session())
+        self.sma_fast = SMA(interval_fast)
+        self.sma_slow = SMA(interval_slow)
+        self.last_bar = None
+        self.currently_holding = False
+
+    def update(self):
+        if self.last_bar is None:
+            start_date = (datetime.now()-timedelta(days=2)).strftime('%Y-%m-%d')
+        else:
+            start_date = self.last_bar
+        df = self.asset.history(start=start_date, interval='1m')
+        if df.empty:
+            return None
+
+        # Der letzte Bar ist noch nicht abgeschlossen und wird erst im nächsten Durchlauf verarbeitet
+        completed = df.iloc[:-1]
+        if self.last_bar is not None:
+            completed = completed[completed.index > self.last_bar]
+        for close in completed['Close']:
+            self.sma_fast.update(close)
+            self.sma_slow.update(close)
+        if not completed.empty:
+            self.last_bar = completed.index[-1]
+        return df.iloc[-1]['Close']
+
+    def check_signal(self):
+        price = self.update()
+        if price is None or not self.sma_slow.ready:
+            return
+
+        if self.sma_fast.value > self.sma_slow.value and not self.currently_holding:
+            print(f"Buy {self.ticker}@{price}")
+            tradelog.append({'date':datetime.now(),'ticker': self.ticker,'side': 'buy','price': price})
+            self.currently_holding = True
+
+        elif self.sma_fast.value < self.sma_slow.value and self.currently_holding:
+            print(f"Sell {self.ticker}@{price}")
+            tradelog.append({'date':datetime.now(),'ticker': self.ticker,'side': 'sell','price': price})
+            self.currently_holding = False
+
+
+bots = [CrossoverBot(ticker) for ticker in tickers]
+
 while True:
-    start_date = (datetime.now()-timedelta(days=2)).strftime('%Y-%m-%d')
-    df = asset.history(start=start_date, interval='1m')
-    
-    del df['Dividends']
-    del df['Stock Splits']
-    del df['Volume']
-    
-    df['SMA_fast'] = ta.sma(df['Close'], interval_fast)
-    df['SMA_slow'] = ta.sma(df['Close'], interval_slow)
-    #print(df)
-    
-    price = df.iloc[-1]['Close']
-    if df.iloc[-1]['SMA_fast'] > df.iloc[-1]['SMA_slow'] and not currently_holding:
-        print(f"Buy {ticker}@{price}")
-        tradelog.append({'date':datetime.now(),'ticker': ticker,'side': 'buy','price': price})
-        currently_holding = True
-    
-    elif df.iloc[-1]['SMA_fast'] < df.iloc[-1]['SMA_slow'] and currently_holding:
-        print(f"Sell {ticker}@{price}")
-        tradelog.append({'date':datetime.now(),'ticker': ticker,'side': 'sell','price': price})
-        currently_holding = False
-    
-    time.sleep(60)
\ No newline at end of file
+    for bot in bots:
+        bot.check_signal()
+
+    time.sleep(60)